@@ -1,10 +1,23 @@
 """MongoDB Model Context Protocol server."""
 
+from typing import TYPE_CHECKING, Any
+
 __version__ = "0.1.0"
 __author__ = "MongoDB MCP Contributors"
 
-# 核心组件可以独立导入和测试
-from .config import get_config, MongoDBConfig
-from .connection import MongoDBConnection
+# 核心组件可以独立导入和测试；按需导入，避免仅使用配置时加载pymongo
+if TYPE_CHECKING:
+    from .config import get_config, MongoDBConfig
+    from .connection import MongoDBConnection
+
+__all__ = ["get_config", "MongoDBConfig", "MongoDBConnection"]
+
 
-__all__ = ["get_config", "MongoDBConfig", "MongoDBConnection"]
\ No newline at end of file
+def __getattr__(name: str) -> Any:
+    if name == "MongoDBConnection":
+        from .connection import MongoDBConnection
+        return MongoDBConnection
+    if name in ("get_config", "MongoDBConfig"):
+        from . import config
+        return getattr(config, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,35 +1,26 @@
 #!/usr/bin/env python3
-"""MongoDB MCP服务器主入口，支持python -m mongodb_mcp启动."""
+"""MongoDB MCP服务器主入口，支持python -m mongodb_mcp启动.
+
+传入 ``--simple`` 时改用不依赖FastMCP的简化服务器（支持JSON-RPC批量请求）。
+"""
 
 import asyncio
 import sys
-from pathlib import Path
-
-# 确保能导入本模块
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from mongodb_mcp.simple_server import main
+from mongodb_mcp.eventloop import install_uvloop
 
 if __name__ == "__main__":
-    # 使用独立服务器实现
+    if "--simple" in sys.argv[1:]:
+        from mongodb_mcp.simple_server import main
+    else:
+        from mongodb_mcp.mcp_server import main
+    
+    # 可选：安装uvloop以加速事件循环调度
+    install_uvloop()
+    
+    # 在当前进程内直接运行stdio服务器
     try:
-        import subprocess
-        import os
-        
-        # 直接运行独立服务器
-        standalone_server = Path(__file__).parent.parent.parent / "standalone_mcp_server.py"
-        
-        # 传递环境变量
-        env = os.environ.copy()
-        
-        # 启动独立服务器
-        process = subprocess.run(
-            [sys.executable, str(standalone_server)],
-            env=env
-        )
-        
-        sys.exit(process.returncode)
-        
+        asyncio.run(main())
     except Exception as e:
         print(f"启动失败: {e}", file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,124 @@
+"""只读元数据的进程内TTL缓存."""
+
+import copy
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """按固定TTL过期、按LRU淘汰的小型缓存.
+
+    键的前四项约定为 ``(方法名, 客户端id, 数据库名, 集合名)``，
+    以便写操作后按数据库/集合粒度失效。
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Tuple[Any, ...]) -> Any:
+        """读取未过期的缓存值，不存在时返回 ``_MISSING``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Tuple[Any, ...], value: Any, ttl_seconds: float) -> None:
+        """写入缓存值，超出容量时淘汰最久未使用的条目."""
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(
+        self,
+        database_name: Optional[str] = None,
+        collection_name: Optional[str] = None
+    ) -> None:
+        """使受指定数据库/集合影响的缓存条目失效.
+
+        不带数据库名的条目（如数据库列表）总会被清除；
+        不指定数据库时清空整个缓存。
+        """
+        if database_name is None:
+            self._entries.clear()
+            return
+
+        for key in list(self._entries):
+            entry_db, entry_coll = key[2], key[3]
+            if entry_db is not None and entry_db != database_name:
+                continue
+            if (
+                collection_name is not None
+                and entry_coll is not None
+                and entry_coll != collection_name
+            ):
+                continue
+            del self._entries[key]
+
+
+# 所有处理器共享的元数据缓存
+metadata_cache = TTLCache()
+
+
+def invalidate(database_name: Optional[str] = None, collection_name: Optional[str] = None) -> None:
+    """写操作后使相关元数据缓存失效."""
+    metadata_cache.invalidate(database_name, collection_name)
+
+
+def _freeze(value: Any) -> Any:
+    """将查询条件等dict/list参数转换为可哈希的键，保留键的顺序.
+
+    标量连同类型一起参与比较，避免 ``True``、``1``、``1.0`` 共用同一键。
+    """
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return (list, tuple(_freeze(item) for item in value))
+    return (type(value), value)
+
+
+def async_ttl_cache(
+    ttl_seconds: float
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """缓存处理器只读方法的结果.
+
+    被装饰的方法须以位置参数 ``(database_name, collection_name, ...)``
+    调用，其余选项以关键字参数传入；处理器实例须持有 ``client`` 属性。
+    dict/list参数（如查询条件）按内容参与缓存键。
+    缓存中保存结果的副本，每次命中也返回新副本，调用方修改结果不会污染缓存。
+    """
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(self: Any, *args: Any, **kwargs: Any) -> T:
+            scope = (args + (None, None))[:2]
+            key = (
+                fn.__qualname__, id(self.client), *scope,
+                *map(_freeze, args[2:]),
+                *sorted((name, _freeze(value)) for name, value in kwargs.items())
+            )
+
+            cached = metadata_cache.get(key)
+            if cached is not _MISSING:
+                return copy.deepcopy(cached)
+
+            result = await fn(self, *args, **kwargs)
+            metadata_cache.set(key, copy.deepcopy(result), ttl_seconds)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,51 @@
+"""BSON decoding options and JSON/MessagePack encoding for query results."""
+
+from decimal import Decimal
+from typing import Any
+
+import msgspec
+import orjson
+from bson import ObjectId, json_util
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
+from bson.decimal128 import Decimal128
+
+
+class ObjectIdAsStrCodec(TypeDecoder):
+    """Decode ObjectId values straight to their hex string form."""
+
+    bson_type = ObjectId
+
+    def transform_bson(self, value: ObjectId) -> str:
+        return str(value)
+
+
+# Codec options for read paths whose results are serialized to JSON
+JSON_CODEC_OPTIONS = CodecOptions(
+    type_registry=TypeRegistry([ObjectIdAsStrCodec()])
+)
+
+
+def _encode_default(obj: Any) -> Any:
+    """Convert BSON types that orjson does not handle natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return str(obj)
+    # Remaining BSON types (Binary, Timestamp, Regex, ...) as Extended JSON
+    return json_util.default(obj)
+
+
+def encode_result(obj: Any, indent: bool = False) -> bytes:
+    """Serialize a handler result to UTF-8 JSON bytes."""
+    option = orjson.OPT_INDENT_2 if indent else 0
+    return orjson.dumps(obj, default=_encode_default, option=option)
+
+
+_MSGPACK_ENCODER = msgspec.msgpack.Encoder(enc_hook=_encode_default)
+
+
+def encode_msgpack(obj: Any) -> bytes:
+    """Serialize a handler result to MessagePack bytes."""
+    return _MSGPACK_ENCODER.encode(obj)
@@ -1,8 +1,9 @@
 """MongoDB MCP服务器配置管理模块."""
 
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -16,6 +17,8 @@ class MongoDBConfig(BaseSettings):
         # .env file. Ignore unknown keys instead of failing validation so the
         # MCP server can coexist with broader application environments.
         extra="ignore",
+        # 配置加载后不可变，连接URI等派生值可以安全地预先计算
+        frozen=True,
     )
     
     # MongoDB连接参数
@@ -67,9 +70,32 @@ class MongoDBConfig(BaseSettings):
         default=20,
         description="聚合管道最大阶段数"
     )
+    mongodb_max_field_bytes: int = Field(
+        default=0,
+        description="查询结果中单个字符串字段的最大字节数，0表示不截断"
+    )
     
-    @property
-    def connection_uri(self) -> str:
+    # 连接池配置
+    mongodb_max_pool_size: int = Field(
+        default=20,
+        description="连接池最大连接数"
+    )
+    mongodb_min_pool_size: int = Field(
+        default=5,
+        description="连接池预热的最小连接数"
+    )
+    
+    _connection_uri: str = PrivateAttr(default="")
+    _is_cluster_mode: bool = PrivateAttr(default=False)
+    
+    def model_post_init(self, __context: Any) -> None:
+        """加载完成后预计算连接URI和集群模式标记."""
+        self._connection_uri = self._build_connection_uri()
+        self._is_cluster_mode = (
+            ',' in self.mongodb_host or 'replicaSet' in (self.mongodb_uri or '')
+        )
+    
+    def _build_connection_uri(self) -> str:
         """构建MongoDB连接URI，支持集群和单机模式."""
         if self.mongodb_uri:
             return self.mongodb_uri
@@ -108,11 +134,18 @@ class MongoDBConfig(BaseSettings):
         
         return f"mongodb://{auth_part}{host_part}/{self.mongodb_database}{param_string}"
     
+    @property
+    def connection_uri(self) -> str:
+        """MongoDB连接URI（加载时预计算）."""
+        return self._connection_uri
+    
     @property 
     def is_cluster_mode(self) -> bool:
         """检测是否为集群模式."""
-        return ',' in self.mongodb_host or 'replicaSet' in (self.mongodb_uri or '')
+        return self._is_cluster_mode
     
+
+@lru_cache(maxsize=1)
 def get_config() -> MongoDBConfig:
-    """获取MongoDB MCP配置实例."""
+    """获取MongoDB MCP配置实例（进程内缓存）."""
     return MongoDBConfig()
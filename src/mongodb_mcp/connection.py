@@ -1,11 +1,30 @@
 """MongoDB连接管理模块."""
 
 import asyncio
-from typing import Optional
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import importlib.util
+import warnings
+from typing import Any, Dict, Optional
+
+import bson
+import pymongo
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 
-from .config import MongoDBConfig
+from .config import MongoDBConfig, get_config
+
+if not (pymongo.has_c() and bson.has_c()):
+    warnings.warn(
+        "PyMongo C扩展不可用，BSON编解码将使用纯Python实现，性能会明显下降",
+        RuntimeWarning,
+    )
+
+# 按优先级排列的线协议压缩算法，仅启用已安装对应模块的算法
+_COMPRESSORS = ",".join(
+    name
+    for name, module in (("zstd", "zstandard"), ("snappy", "snappy"), ("zlib", "zlib"))
+    if importlib.util.find_spec(module) is not None
+)
 
 
 class MongoDBConnection:
@@ -13,15 +32,15 @@ class MongoDBConnection:
     
     def __init__(self, config: MongoDBConfig):
         self.config = config
-        self._client: Optional[AsyncIOMotorClient] = None
-        self._database: Optional[AsyncIOMotorDatabase] = None
+        self._client: Optional[AsyncMongoClient] = None
+        self._database: Optional[AsyncDatabase] = None
     
     async def connect(self) -> None:
         """建立MongoDB连接."""
         try:
-            self._client = AsyncIOMotorClient(
+            self._client = AsyncMongoClient(
                 self.config.connection_uri,
-                serverSelectionTimeoutMS=self.config.mongodb_timeout * 1000
+                **self._client_options()
             )
             
             # 测试连接
@@ -32,29 +51,105 @@ class MongoDBConnection:
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             raise ConnectionError(f"连接MongoDB失败: {e}")
     
+    def _client_options(self) -> Dict[str, Any]:
+        """构建客户端选项：连接池大小、线协议压缩和读重试."""
+        options: Dict[str, Any] = {
+            'serverSelectionTimeoutMS': self.config.mongodb_timeout * 1000,
+            'compressors': _COMPRESSORS,
+            'zlibCompressionLevel': 6,
+            'maxPoolSize': self.config.mongodb_max_pool_size,
+            'minPoolSize': self.config.mongodb_min_pool_size,
+            'maxIdleTimeMS': 60000,
+            'retryReads': True,
+        }
+        
+        # 集群模式下优先从从节点读取，URI中显式指定时以URI为准
+        if self.config.is_cluster_mode and 'readPreference' not in self.config.connection_uri:
+            options['readPreference'] = 'secondaryPreferred'
+        
+        return options
+    
     async def disconnect(self) -> None:
         """关闭MongoDB连接."""
-        if self._client:
-            self._client.close()
+        if self._client is not None:
+            await self._client.close()
             self._client = None
             self._database = None
     
     @property
-    def client(self) -> AsyncIOMotorClient:
+    def client(self) -> AsyncMongoClient:
         """获取MongoDB客户端实例."""
-        if not self._client:
+        if self._client is None:
             raise RuntimeError("未连接到MongoDB")
         return self._client
     
     @property
-    def database(self) -> AsyncIOMotorDatabase:
+    def database(self) -> AsyncDatabase:
         """获取默认数据库实例."""
-        if not self._database:
+        if self._database is None:
             raise RuntimeError("未连接到MongoDB")
         return self._database
     
-    def get_database(self, name: str) -> AsyncIOMotorDatabase:
+    def get_database(self, name: str) -> AsyncDatabase:
         """获取指定数据库实例."""
-        if not self._client:
+        if self._client is None:
             raise RuntimeError("未连接到MongoDB")
-        return self._client[name]
\ No newline at end of file
+        return self._client[name]
+
+
+class MongoClientPool:
+    """按事件循环复用MongoDB连接.
+    
+    异步客户端绑定到创建它的事件循环，同一事件循环内的所有服务器和处理器
+    共享一个连接池，不同事件循环（测试、重载）各自持有一个连接。
+    """
+    
+    def __init__(self):
+        self._connections: Dict[asyncio.AbstractEventLoop, MongoDBConnection] = {}
+        self._locks: Dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+    
+    async def get(self) -> MongoDBConnection:
+        """获取当前事件循环的连接，首次调用时建立连接."""
+        loop = asyncio.get_running_loop()
+        connection = self._connections.get(loop)
+        if connection is not None:
+            return connection
+        
+        # 并发的首次调用只建立一次连接
+        lock = self._locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            connection = self._connections.get(loop)
+            if connection is None:
+                self._discard_closed_loops()
+                connection = MongoDBConnection(get_config())
+                await connection.connect()
+                self._connections[loop] = connection
+        return connection
+    
+    async def close(self) -> None:
+        """关闭当前事件循环的连接."""
+        loop = asyncio.get_running_loop()
+        self._locks.pop(loop, None)
+        connection = self._connections.pop(loop, None)
+        if connection is not None:
+            await connection.disconnect()
+    
+    def _discard_closed_loops(self) -> None:
+        """丢弃已关闭事件循环遗留的连接，其客户端已无法再使用."""
+        for loop in [loop for loop in self._connections if loop.is_closed()]:
+            del self._connections[loop]
+            self._locks.pop(loop, None)
+
+
+# 进程内共享的连接池
+client_pool = MongoClientPool()
+
+
+async def get_connection() -> MongoDBConnection:
+    """获取当前事件循环共享的MongoDB连接."""
+    return await client_pool.get()
+
+
+async def close_connection() -> None:
+    """关闭当前事件循环共享的MongoDB连接."""
+    await client_pool.close()
@@ -0,0 +1,20 @@
+"""事件循环配置."""
+
+import asyncio
+import sys
+
+
+def install_uvloop() -> bool:
+    """已安装uvloop时将其设为asyncio事件循环实现，返回是否启用."""
+    # uvloop不支持Windows，直接使用默认事件循环
+    if sys.platform == 'win32':
+        return False
+    
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    
+    # uvloop.install()在Python 3.12+上已弃用，直接设置事件循环策略
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
@@ -1,18 +1,71 @@
 """Aggregation pipeline operations handler."""
 
-from typing import Dict, Any, List
-from motor.motor_asyncio import AsyncIOMotorClient
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pymongo import AsyncMongoClient
 from pymongo.errors import OperationFailure
-from bson import ObjectId
 
+from ..cache import invalidate
+from ..codecs import JSON_CODEC_OPTIONS
 from ..security.validator import AggregationValidator
 from ..security.sanitizer import InputSanitizer
 
+# Stages after which no automatic $limit is appended ($out/$merge must be last)
+_TERMINAL_STAGES = frozenset({'$limit', '$out', '$merge'})
+
+# Accepted index key types
+_INDEX_DIRECTIONS = {
+    1: 1, -1: -1,
+    'text': 'text', '2d': '2d', '2dsphere': '2dsphere', 'hashed': 'hashed'
+}
+
+# Index options forwarded to createIndexes
+_INDEX_OPTIONS = frozenset({
+    'name', 'unique', 'sparse', 'partialFilterExpression',
+    'expireAfterSeconds', 'collation', 'wildcardProjection', 'hidden'
+})
+
+
+def _normalize_direction(field: str, direction: Any) -> Any:
+    """Validate an index key type, normalizing numeric directions to int."""
+    # True hashes like 1 but is not a valid index direction
+    if type(direction) is not bool:
+        try:
+            return _INDEX_DIRECTIONS[direction]
+        except (KeyError, TypeError):
+            pass
+    raise ValueError(f"Invalid index type for field '{field}': {direction!r}")
+
+
+def _write_target(
+    database_name: str,
+    stage: Dict[str, Any]
+) -> Optional[Tuple[str, Optional[str]]]:
+    """Return the ``(database, collection)`` written by a ``$out``/``$merge`` stage."""
+    if '$out' in stage:
+        target = stage['$out']
+    elif '$merge' in stage:
+        target = stage['$merge']
+        if isinstance(target, dict):
+            target = target.get('into')
+    else:
+        return None
+    
+    if isinstance(target, dict):
+        return target.get('db', database_name), target.get('coll')
+    return database_name, target if isinstance(target, str) else None
+
+
+def _invalidate_write_target(database_name: str, pipeline: List[Dict[str, Any]]) -> None:
+    """Invalidate cached metadata for the collection a pipeline writes to."""
+    target = _write_target(database_name, pipeline[-1]) if pipeline else None
+    if target is not None:
+        invalidate(*target)
+
 
 class AggregationHandler:
     """Handles MongoDB aggregation operations."""
     
-    def __init__(self, client: AsyncIOMotorClient, allow_dangerous: bool = False):
+    def __init__(self, client: AsyncMongoClient, allow_dangerous: bool = False):
         self.client = client
         self.allow_dangerous = allow_dangerous
     
@@ -22,36 +75,33 @@ class AggregationHandler:
         collection_name: str,
         pipeline: List[Dict[str, Any]],
         limit: int = 100,
-        max_stages: int = 20
+        max_stages: int = 20,
+        batch_size: int = 1000
     ) -> Dict[str, Any]:
-        """Execute MongoDB aggregation pipeline."""
+        """Execute MongoDB aggregation pipeline.
+        
+        Results are fetched ``batch_size`` at a time (capped at ``limit``);
+        setting it to ``limit`` returns everything in the first batch.
+        """
         try:
-            # Validate pipeline
-            AggregationValidator.validate_pipeline(
-                pipeline, self.allow_dangerous, max_stages
-            )
-            
-            # Sanitize pipeline stages
-            sanitized_pipeline = []
-            for stage in pipeline:
-                sanitized_stage = InputSanitizer.sanitize_query(stage)
-                sanitized_pipeline.append(sanitized_stage)
-            
-            # Add automatic limit if not present
-            has_limit = any('$limit' in stage for stage in sanitized_pipeline)
-            if not has_limit and limit > 0:
-                sanitized_pipeline.append({'$limit': limit})
+            sanitized_pipeline = self._prepare_pipeline(pipeline, limit, max_stages)
             
             db = self.client[database_name]
-            collection = db[collection_name]
+            # ObjectIds are decoded to strings for JSON serialization
+            collection = db[collection_name].with_options(
+                codec_options=JSON_CODEC_OPTIONS
+            )
             
-            # Execute aggregation
-            results = []
-            async for doc in collection.aggregate(sanitized_pipeline):
-                # Convert ObjectId to string for JSON serialization
-                if '_id' in doc and isinstance(doc['_id'], ObjectId):
-                    doc['_id'] = str(doc['_id'])
-                results.append(doc)
+            # Execute aggregation, draining the cursor in batches. The appended
+            # $limit stays last: moving it before $group/$unwind would change the
+            # result, and the server already fuses a trailing $sort+$limit into
+            # a top-k sort. The client-side cap also bounds explicit $limit values.
+            if limit > 0:
+                batch_size = min(limit, batch_size)
+            cursor = await collection.aggregate(sanitized_pipeline, batchSize=batch_size)
+            # $out/$merge finish writing before the aggregate command returns
+            _invalidate_write_target(database_name, sanitized_pipeline)
+            results = await cursor.to_list(length=limit if limit > 0 else None)
             
             return {
                 'results': results,
@@ -65,6 +115,71 @@ class AggregationHandler:
         except Exception as e:
             raise RuntimeError(f"Pipeline execution failed: {e}")
     
+    async def stream_pipeline(
+        self,
+        database_name: str,
+        collection_name: str,
+        pipeline: List[Dict[str, Any]],
+        limit: int = 100,
+        max_stages: int = 20,
+        batch_size: int = 100
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Execute an aggregation pipeline, yielding results in batches.
+        
+        Same validation and limits as ``aggregate_pipeline``, but at most
+        ``batch_size`` results are held in memory at a time.
+        """
+        sanitized_pipeline = self._prepare_pipeline(pipeline, limit, max_stages)
+        collection = self.client[database_name][collection_name].with_options(
+            codec_options=JSON_CODEC_OPTIONS
+        )
+        
+        try:
+            cursor = await collection.aggregate(sanitized_pipeline, batchSize=batch_size)
+        except OperationFailure as e:
+            raise RuntimeError(f"Aggregation failed: {e}")
+        _invalidate_write_target(database_name, sanitized_pipeline)
+        
+        try:
+            remaining = limit if limit > 0 else None
+            while remaining is None or remaining > 0:
+                length = batch_size if remaining is None else min(batch_size, remaining)
+                batch = await cursor.to_list(length=length)
+                if not batch:
+                    return
+                if remaining is not None:
+                    remaining -= len(batch)
+                yield batch
+        except OperationFailure as e:
+            raise RuntimeError(f"Aggregation failed: {e}")
+        finally:
+            await cursor.close()
+    
+    def _prepare_pipeline(
+        self,
+        pipeline: List[Dict[str, Any]],
+        limit: int,
+        max_stages: int
+    ) -> List[Dict[str, Any]]:
+        """Validate and sanitize a pipeline, appending ``$limit`` when needed."""
+        AggregationValidator.validate_pipeline(
+            pipeline, self.allow_dangerous, max_stages
+        )
+        
+        # Sanitize pipeline stages, detecting $limit/$out/$merge in the same pass
+        sanitized_pipeline = []
+        has_limit = False
+        for stage in pipeline:
+            sanitized_stage = InputSanitizer.sanitize_query(stage)
+            has_limit = has_limit or not _TERMINAL_STAGES.isdisjoint(sanitized_stage)
+            sanitized_pipeline.append(sanitized_stage)
+        
+        # Add automatic limit if not present
+        if not has_limit and limit > 0:
+            sanitized_pipeline.append({'$limit': limit})
+        
+        return sanitized_pipeline
+    
     async def explain_aggregation(
         self,
         database_name: str,
@@ -78,15 +193,19 @@ class AggregationHandler:
             )
             
             db = self.client[database_name]
-            collection = db[collection_name]
-            
-            # Get execution stats
-            explain_pipeline = pipeline + [{'$explain': {'verbosity': 'executionStats'}}]
             
-            result = await collection.aggregate(explain_pipeline).to_list(length=1)
+            # Get execution stats via the explain command ($explain is not a stage)
+            result = await db.command({
+                'explain': {
+                    'aggregate': collection_name,
+                    'pipeline': pipeline,
+                    'cursor': {}
+                },
+                'verbosity': 'executionStats'
+            })
             
             return {
-                'executionPlan': result[0] if result else {},
+                'executionPlan': result,
                 'pipeline': pipeline
             }
             
@@ -104,11 +223,22 @@ class AggregationHandler:
         if not self.allow_dangerous:
             raise PermissionError("Index creation requires dangerous mode")
         
+        if not keys:
+            raise ValueError("Index keys must not be empty")
+        
+        unknown = kwargs.keys() - _INDEX_OPTIONS
+        if unknown:
+            raise ValueError(f"Unsupported index options: {', '.join(sorted(unknown))}")
+        
+        # Compound key order follows the order the keys were given in
+        index_spec = [(field, _normalize_direction(field, direction)) for field, direction in keys.items()]
+        
         try:
             db = self.client[database_name]
             collection = db[collection_name]
             
-            index_name = await collection.create_index(list(keys.items()), **kwargs)
+            index_name = await collection.create_index(index_spec, **kwargs)
+            invalidate(database_name, collection_name)
             
             return {
                 'indexName': index_name,
@@ -0,0 +1,102 @@
+"""Coalescing of concurrent single-document reads."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo.asynchronous.collection import AsyncCollection
+
+
+class BatchedReader:
+    """Merges ``_id`` lookups issued within one event-loop tick into one ``$in`` query.
+
+    Lookups are grouped by projection and by the type of the id. Ids that
+    compare equal in Python but are distinct ``_id`` values in MongoDB
+    (``True`` and ``1``, ``"abc"`` and ``ObjectId``) never share a query,
+    so every returned document maps back to exactly one pending lookup even
+    when the collection decodes ObjectIds to strings.
+    """
+
+    def __init__(self, collection: AsyncCollection):
+        self.collection = collection
+        self._pending: Dict[Tuple[type, str], Dict[Any, List[asyncio.Future]]] = {}
+        self._projections: Dict[Tuple[type, str], Optional[Dict[str, Any]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._scheduled = False
+
+    @staticmethod
+    def can_batch(query: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> bool:
+        """Whether a find_one call is a plain ``_id`` equality lookup."""
+        if len(query) != 1 or '_id' not in query:
+            return False
+
+        if isinstance(query['_id'], (dict, list)):
+            return False
+
+        # _id must come back in the results to route documents to their callers
+        return projection is None or '_id' not in projection
+
+    async def find_one(
+        self,
+        document_id: Any,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Queue an ``_id`` lookup and wait for the batched result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        group_key = (type(document_id), repr(projection))
+        self._projections[group_key] = projection
+        self._pending.setdefault(group_key, {}).setdefault(document_id, []).append(future)
+
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Issue one query per pending group."""
+        pending, self._pending = self._pending, {}
+        projections, self._projections = self._projections, {}
+        self._scheduled = False
+
+        for group_key, waiters in pending.items():
+            task = asyncio.ensure_future(
+                self._fetch(group_key[0] is ObjectId, projections[group_key], waiters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(
+        self,
+        is_object_id: bool,
+        projection: Optional[Dict[str, Any]],
+        waiters: Dict[Any, List[asyncio.Future]]
+    ) -> None:
+        """Run a batched ``$in`` query and resolve the waiting lookups."""
+        try:
+            docs = await self.collection.find(
+                {'_id': {'$in': list(waiters)}}, projection
+            ).to_list(length=None)
+
+            found = {}
+            for doc in docs:
+                key = doc['_id']
+                found[str(key) if isinstance(key, ObjectId) else key] = doc
+
+            for document_id, futures in waiters.items():
+                doc = found.get(str(document_id) if is_object_id else document_id)
+                for future in futures:
+                    if not future.done():
+                        future.set_result(doc)
+        except Exception as e:
+            for futures in waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+        finally:
+            # A cancelled fetch must not leave its callers waiting forever
+            for futures in waiters.values():
+                for future in futures:
+                    future.cancel()
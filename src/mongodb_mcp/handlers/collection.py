@@ -1,56 +1,54 @@
 """Collection-level operations handler."""
 
-from typing import List, Dict, Any
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.command_cursor import AsyncCommandCursor
 from pymongo.errors import OperationFailure
 
+from ..cache import async_ttl_cache
+
+
+async def _drain(
+    cursor: Awaitable[AsyncCommandCursor], length: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Await a command cursor and read it to a list."""
+    return await (await cursor).to_list(length=length)
+
 
 class CollectionHandler:
     """Handles MongoDB collection-level operations."""
     
-    def __init__(self, client: AsyncIOMotorClient):
+    def __init__(self, client: AsyncMongoClient):
         self.client = client
     
+    @async_ttl_cache(ttl_seconds=30)
     async def list_collections(self, database_name: str) -> List[Dict[str, Any]]:
         """列出指定数据库中的所有集合."""
         try:
             db = self.client[database_name]
-            # 获取集合名称列表
+            # 获取集合名称列表并构建集合信息列表
             collection_names = await db.list_collection_names()
-            
-            # 构建集合信息列表
-            collections = []
-            for name in collection_names:
-                collections.append({
-                    'name': name,
-                    'type': 'collection'
-                })
-            return collections
+            return [{'name': name, 'type': 'collection'} for name in collection_names]
         except OperationFailure as e:
             raise RuntimeError(f"获取集合列表失败: {e}")
     
+    @async_ttl_cache(ttl_seconds=60)
     async def describe_collection(self, database_name: str, collection_name: str) -> Dict[str, Any]:
         """Get collection metadata, indexes, and sample schema."""
         try:
             db = self.client[database_name]
             collection = db[collection_name]
             
-            # Get indexes
-            indexes = []
-            async for index in collection.list_indexes():
-                indexes.append(index)
-            
-            # Get collection stats
-            stats = await db.command('collStats', collection_name)
-            
-            # Get sample documents to infer schema
-            sample_docs = []
-            async for doc in collection.aggregate([
-                {'$sample': {'size': 5}},
-                {'$project': {field: {'$type': f'${field}'} for field in ['_id']}}
-            ]):
-                # Extract field types from sample
-                sample_docs.append(doc)
+            # Indexes, stats and schema sample are independent: fetch concurrently
+            indexes, stats, sample_docs = await asyncio.gather(
+                _drain(collection.list_indexes()),
+                self._collstats(database_name, collection_name),
+                _drain(collection.aggregate([
+                    {'$sample': {'size': 5}},
+                    {'$project': {field: {'$type': f'${field}'} for field in ['_id']}}
+                ]), length=5),
+            )
             
             return {
                 'collection': collection_name,
@@ -67,11 +65,11 @@ class CollectionHandler:
         except OperationFailure as e:
             raise RuntimeError(f"Failed to describe collection: {e}")
     
+    @async_ttl_cache(ttl_seconds=30)
     async def get_collection_stats(self, database_name: str, collection_name: str) -> Dict[str, Any]:
         """Get collection performance statistics."""
         try:
-            db = self.client[database_name]
-            stats = await db.command('collStats', collection_name)
+            stats = await self._collstats(database_name, collection_name)
             
             return {
                 'collection': collection_name,
@@ -86,15 +84,18 @@ class CollectionHandler:
         except OperationFailure as e:
             raise RuntimeError(f"Failed to get collection stats: {e}")
     
+    @async_ttl_cache(ttl_seconds=30)
+    async def _collstats(self, database_name: str, collection_name: str) -> Dict[str, Any]:
+        """Run collStats once and share the raw result between callers."""
+        return await self.client[database_name].command('collStats', collection_name)
+    
+    @async_ttl_cache(ttl_seconds=30)
     async def list_indexes(self, database_name: str, collection_name: str) -> List[Dict[str, Any]]:
         """List all indexes for a collection."""
         try:
             db = self.client[database_name]
             collection = db[collection_name]
             
-            indexes = []
-            async for index in collection.list_indexes():
-                indexes.append(index)
-            return indexes
+            return await _drain(collection.list_indexes())
         except OperationFailure as e:
             raise RuntimeError(f"Failed to list indexes: {e}")
\ No newline at end of file
@@ -1,22 +1,29 @@
 """Database-level operations handler."""
 
 from typing import List, Dict, Any
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from pymongo.errors import OperationFailure
 
+from ..cache import async_ttl_cache
+
 
 class DatabaseHandler:
     """Handles MongoDB database-level operations."""
     
-    def __init__(self, client: AsyncIOMotorClient):
+    def __init__(self, client: AsyncMongoClient):
         self.client = client
     
-    async def list_databases(self) -> List[Dict[str, Any]]:
-        """列出所有可用的数据库."""
+    @async_ttl_cache(ttl_seconds=30)
+    async def list_databases(self, *, name_only: bool = False) -> List[Dict[str, Any]]:
+        """列出所有可用的数据库.
+        
+        Args:
+            name_only: 仅返回数据库名称，跳过服务端的大小统计
+        """
         try:
             # 使用admin.command方式获取数据库列表
             admin_db = self.client.admin
-            result = await admin_db.command("listDatabases")
+            result = await admin_db.command("listDatabases", nameOnly=name_only)
             return result.get('databases', [])
         except OperationFailure as e:
             raise RuntimeError(f"获取数据库列表失败: {e}")
@@ -42,7 +49,10 @@ class DatabaseHandler:
     async def database_exists(self, database_name: str) -> bool:
         """检查数据库是否存在."""
         try:
-            databases = await self.list_databases()
-            return any(db['name'] == database_name for db in databases)
+            # 服务端按名称过滤，只返回名称
+            result = await self.client.admin.command(
+                "listDatabases", filter={'name': database_name}, nameOnly=True
+            )
+            return bool(result.get('databases'))
         except Exception:
             return False
\ No newline at end of file
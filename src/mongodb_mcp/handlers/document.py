@@ -1,26 +1,61 @@
 """MongoDB文档CRUD操作处理器."""
 
-from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.cursor import AsyncCursor
 from pymongo.errors import OperationFailure
-from bson import ObjectId
 
-from ..security.validator import QueryValidator
+from ..cache import async_ttl_cache, invalidate
+from ..codecs import JSON_CODEC_OPTIONS
+from ..security.pipeline import SecurityPipeline
 from ..security.sanitizer import InputSanitizer
+from .batching import BatchedReader
+
+# 保留合并读取器的集合数上限，超出时淘汰最久未使用的集合
+_MAX_READERS = 64
+
+
+def _truncate_strings(value: Any, max_bytes: int) -> Any:
+    """截断超过 ``max_bytes`` 个UTF-8字节的字符串，容器就地修改."""
+    if isinstance(value, str):
+        # 每个字符最多4字节，足够短的字符串无需编码
+        if len(value) * 4 <= max_bytes:
+            return value
+        encoded = value.encode('utf-8')
+        if len(encoded) <= max_bytes:
+            return value
+        return encoded[:max_bytes].decode('utf-8', 'ignore')
+    if isinstance(value, dict):
+        for key, item in value.items():
+            value[key] = _truncate_strings(item, max_bytes)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            value[index] = _truncate_strings(item, max_bytes)
+    return value
 
 
 class DocumentHandler:
     """处理MongoDB文档操作的核心类."""
     
-    def __init__(self, client: AsyncIOMotorClient, allow_dangerous: bool = False):
+    def __init__(
+        self,
+        client: AsyncMongoClient,
+        allow_dangerous: bool = False,
+        max_field_bytes: int = 0
+    ):
         """初始化文档处理器.
         
         Args:
             client: MongoDB异步客户端
             allow_dangerous: 是否允许危险的写操作
+            max_field_bytes: 查询结果中字符串字段的最大字节数，0表示不截断
         """
         self.client = client
         self.allow_dangerous = allow_dangerous
+        self.max_field_bytes = max_field_bytes
+        self._readers: "OrderedDict[Tuple[str, str], BatchedReader]" = OrderedDict()
     
     async def find_documents(
         self,
@@ -30,7 +65,8 @@ class DocumentHandler:
         projection: Dict[str, Any] = None,
         sort: Dict[str, Any] = None,
         limit: int = 100,
-        skip: int = 0
+        skip: int = 0,
+        batch_size: int = 1000
     ) -> Dict[str, Any]:
         """查找匹配查询条件的文档.
         
@@ -42,6 +78,8 @@ class DocumentHandler:
             sort: 排序条件
             limit: 限制返回文档数量
             skip: 跳过的文档数量
+            batch_size: 每次从服务器拉取的文档数（不超过limit），
+                设为limit时一次往返取回全部结果，无需getMore
             
         Returns:
             包含文档列表和元数据的字典
@@ -51,31 +89,23 @@ class DocumentHandler:
         
         try:
             # 验证和清理输入参数
-            QueryValidator.validate_query(query, self.allow_dangerous)
-            query = InputSanitizer.sanitize_query(query)
+            query = SecurityPipeline.process_query(query, self.allow_dangerous)
             
             db = self.client[database_name]
-            collection = db[collection_name]
-            
-            # 构建查询游标并设置可选参数
-            cursor = collection.find(query, projection)
+            # 解码时直接将ObjectId转换为字符串以便JSON序列化
+            collection = db[collection_name].with_options(
+                codec_options=JSON_CODEC_OPTIONS
+            )
             
-            if sort:
-                cursor = cursor.sort(list(sort.items()))
+            cursor = self._find_cursor(
+                collection, query, projection, sort, limit, skip, batch_size
+            )
             
-            if skip > 0:
-                cursor = cursor.skip(skip)
+            # 批量拉取结果，避免逐条文档的事件循环往返
+            documents = await cursor.to_list(length=limit if limit > 0 else None)
             
-            if limit > 0:
-                cursor = cursor.limit(limit)
-            
-            # 执行查询并转换结果
-            documents = []
-            async for doc in cursor:
-                # 将ObjectId转换为字符串以便JSON序列化
-                if '_id' in doc and isinstance(doc['_id'], ObjectId):
-                    doc['_id'] = str(doc['_id'])
-                documents.append(doc)
+            if self.max_field_bytes > 0:
+                documents = _truncate_strings(documents, self.max_field_bytes)
             
             return {
                 'documents': documents,
@@ -89,6 +119,65 @@ class DocumentHandler:
         except Exception as e:
             raise RuntimeError(f"Find operation failed: {e}")
     
+    async def stream_documents(
+        self,
+        database_name: str,
+        collection_name: str,
+        query: Dict[str, Any] = None,
+        projection: Dict[str, Any] = None,
+        sort: Dict[str, Any] = None,
+        limit: int = 100,
+        skip: int = 0,
+        batch_size: int = 100
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """分批读取匹配查询条件的文档，内存中最多保留一批结果.
+        
+        参数与 ``find_documents`` 相同，每次产出最多 ``batch_size`` 个文档。
+        """
+        query = SecurityPipeline.process_query(query or {}, self.allow_dangerous)
+        collection = self.client[database_name][collection_name].with_options(
+            codec_options=JSON_CODEC_OPTIONS
+        )
+        cursor = self._find_cursor(collection, query, projection, sort, limit, skip, batch_size)
+        
+        try:
+            while True:
+                documents = await cursor.to_list(length=batch_size)
+                if not documents:
+                    return
+                if self.max_field_bytes > 0:
+                    documents = _truncate_strings(documents, self.max_field_bytes)
+                yield documents
+        except OperationFailure as e:
+            raise RuntimeError(f"Query failed: {e}")
+        finally:
+            await cursor.close()
+    
+    @staticmethod
+    def _find_cursor(
+        collection: AsyncCollection,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]],
+        sort: Optional[Dict[str, Any]],
+        limit: int,
+        skip: int,
+        batch_size: int
+    ) -> AsyncCursor:
+        """构建查询游标并设置可选参数."""
+        cursor = collection.find(query, projection)
+        
+        if sort:
+            cursor = cursor.sort(list(sort.items()))
+        
+        if skip > 0:
+            cursor = cursor.skip(skip)
+        
+        if limit > 0:
+            cursor = cursor.limit(limit)
+            batch_size = min(limit, batch_size)
+        
+        return cursor.batch_size(batch_size)
+    
     async def find_one_document(
         self,
         database_name: str,
@@ -101,22 +190,44 @@ class DocumentHandler:
             query = {}
         
         try:
-            QueryValidator.validate_query(query, self.allow_dangerous)
-            query = InputSanitizer.sanitize_query(query)
+            query = SecurityPipeline.process_query(query, self.allow_dangerous)
             
             db = self.client[database_name]
-            collection = db[collection_name]
-            
-            doc = await collection.find_one(query, projection)
+            collection = db[collection_name].with_options(
+                codec_options=JSON_CODEC_OPTIONS
+            )
             
-            if doc and '_id' in doc and isinstance(doc['_id'], ObjectId):
-                doc['_id'] = str(doc['_id'])
+            # 并发的按_id查询合并为一次$in查询
+            if BatchedReader.can_batch(query, projection):
+                reader = self._reader(database_name, collection_name, collection)
+                return await reader.find_one(query['_id'], projection)
             
-            return doc
+            return await collection.find_one(query, projection)
             
         except OperationFailure as e:
             raise RuntimeError(f"Find one failed: {e}")
     
+    def _reader(
+        self,
+        database_name: str,
+        collection_name: str,
+        collection: AsyncCollection
+    ) -> BatchedReader:
+        """获取集合的合并读取器，按LRU保留最多 ``_MAX_READERS`` 个.
+        
+        被淘汰的读取器仍会完成已排队的查询，只是不再与新的查询合并。
+        """
+        key = (database_name, collection_name)
+        reader = self._readers.get(key)
+        if reader is None:
+            reader = BatchedReader(collection)
+            self._readers[key] = reader
+            if len(self._readers) > _MAX_READERS:
+                self._readers.popitem(last=False)
+        else:
+            self._readers.move_to_end(key)
+        return reader
+    
     async def count_documents(
         self,
         database_name: str,
@@ -127,10 +238,19 @@ class DocumentHandler:
         if query is None:
             query = {}
         
+        # 先校验再查缓存：缓存键只包含已通过本处理器校验的查询
+        query = SecurityPipeline.process_query(query, self.allow_dangerous)
+        return await self._count(database_name, collection_name, query)
+    
+    @async_ttl_cache(ttl_seconds=5)
+    async def _count(
+        self,
+        database_name: str,
+        collection_name: str,
+        query: Dict[str, Any]
+    ) -> int:
+        """执行已校验查询的计数."""
         try:
-            QueryValidator.validate_query(query, self.allow_dangerous)
-            query = InputSanitizer.sanitize_query(query)
-            
             db = self.client[database_name]
             collection = db[collection_name]
             
@@ -156,6 +276,7 @@ class DocumentHandler:
             collection = db[collection_name]
             
             result = await collection.insert_one(document)
+            invalidate(database_name, collection_name)
             
             return {
                 'insertedId': str(result.inserted_id),
@@ -178,14 +299,14 @@ class DocumentHandler:
             raise PermissionError("Write operations require dangerous mode")
         
         try:
-            QueryValidator.validate_query(query, self.allow_dangerous)
-            query = InputSanitizer.sanitize_query(query)
+            query = SecurityPipeline.process_query(query, self.allow_dangerous)
             update = InputSanitizer.sanitize_document(update)
             
             db = self.client[database_name]
             collection = db[collection_name]
             
             result = await collection.update_many(query, update, upsert=upsert)
+            invalidate(database_name, collection_name)
             
             return {
                 'matchedCount': result.matched_count,
@@ -208,13 +329,13 @@ class DocumentHandler:
             raise PermissionError("Write operations require dangerous mode")
         
         try:
-            QueryValidator.validate_query(query, self.allow_dangerous)
-            query = InputSanitizer.sanitize_query(query)
+            query = SecurityPipeline.process_query(query, self.allow_dangerous)
             
             db = self.client[database_name]
             collection = db[collection_name]
             
             result = await collection.delete_many(query)
+            invalidate(database_name, collection_name)
             
             return {
                 'deletedCount': result.deleted_count,
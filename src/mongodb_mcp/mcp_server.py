@@ -1,28 +1,122 @@
 #!/usr/bin/env python3
 """标准MCP协议stdio服务器实现."""
 
-import json
 import sys
 import asyncio
+import base64
 import logging
-from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set
 
-# 添加路径支持
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import orjson
 
+from mongodb_mcp.codecs import encode_msgpack, encode_result
 from mongodb_mcp.config import get_config
-from mongodb_mcp.connection import MongoDBConnection
+from mongodb_mcp.connection import MongoDBConnection, close_connection, get_connection
+from mongodb_mcp.eventloop import install_uvloop
 from mongodb_mcp.handlers import DatabaseHandler, CollectionHandler, DocumentHandler, AggregationHandler
+from mongodb_mcp.stdio import configure_logging, read_lines
 
-# 配置日志输出到stderr，避免干扰stdio通信
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stderr
-)
 logger = logging.getLogger(__name__)
 
+# 客户端在initialize的experimental能力中声明后，工具结果以MessagePack返回
+MSGPACK_CAPABILITY = "x-msgpack"
+
+# find_documents未指定投影时不返回_id，减少序列化和传输的数据量
+_DEFAULT_PROJECTION = {"_id": 0}
+
+# tools/list的返回内容在进程内不变，预先构建并序列化
+_TOOLS_LIST = [
+    {
+        "name": "list_databases",
+        "description": "列出所有可用的MongoDB数据库",
+        "inputSchema": {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    },
+    {
+        "name": "list_collections", 
+        "description": "列出数据库中的集合",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "database": {"type": "string", "description": "数据库名称"}
+            },
+            "required": ["database"]
+        }
+    },
+    {
+        "name": "find_documents",
+        "description": "查询匹配条件的文档", 
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "database": {"type": "string", "description": "数据库名称"},
+                "collection": {"type": "string", "description": "集合名称"},
+                "query": {"type": "object", "description": "查询条件"},
+                "projection": {"type": "object", "description": "投影字段，省略时默认不返回_id"},
+                "limit": {"type": "integer", "description": "限制结果数量", "default": 100}
+            },
+            "required": ["database", "collection"]
+        }
+    },
+    {
+        "name": "count_documents",
+        "description": "统计匹配条件的文档数量",
+        "inputSchema": {
+            "type": "object", 
+            "properties": {
+                "database": {"type": "string", "description": "数据库名称"},
+                "collection": {"type": "string", "description": "集合名称"},
+                "query": {"type": "object", "description": "查询条件"}
+            },
+            "required": ["database", "collection"]
+        }
+    },
+    {
+        "name": "aggregate_pipeline",
+        "description": "执行MongoDB聚合管道",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "database": {"type": "string", "description": "数据库名称"},
+                "collection": {"type": "string", "description": "集合名称"},
+                "pipeline": {"type": "array", "description": "聚合管道阶段"},
+                "limit": {"type": "integer", "description": "限制结果数量", "default": 100}
+            },
+            "required": ["database", "collection", "pipeline"]
+        }
+    }
+]
+_TOOLS_LIST_RESULT = {"tools": _TOOLS_LIST}
+_TOOLS_LIST_BYTES = orjson.dumps(_TOOLS_LIST_RESULT)
+
+# 常用错误码的响应片段预先序列化，发送时只拼接id和错误信息
+_ERROR_PREFIX = b'{"jsonrpc":"2.0","id":'
+_ERROR_CODE_PARTS = {
+    code: b',"error":{"code":%d,"message":' % code
+    for code in (-32700, -32601, -32603)
+}
+
+# 工具名 -> 以(处理器表, 参数)调用对应处理器方法，返回待await的协程
+_TOOL_CALLS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]] = {
+    "list_databases": lambda h, a: h['database'].list_databases(),
+    "list_collections": lambda h, a: h['collection'].list_collections(a.get('database')),
+    "find_documents": lambda h, a: h['document'].find_documents(
+        a.get('database'), a.get('collection'), a.get('query', {}),
+        p if (p := a.get('projection')) is not None else _DEFAULT_PROJECTION,
+        limit=a.get('limit', 100)
+    ),
+    "count_documents": lambda h, a: h['document'].count_documents(
+        a.get('database'), a.get('collection'), a.get('query', {})
+    ),
+    "aggregate_pipeline": lambda h, a: h['aggregation'].aggregate_pipeline(
+        a.get('database'), a.get('collection'), a.get('pipeline', []),
+        a.get('limit', 100)
+    ),
+}
+
 
 class MCPServer:
     """标准MCP协议服务器实现."""
@@ -30,25 +124,38 @@ class MCPServer:
     def __init__(self):
         """初始化MCP服务器."""
         self.config = get_config()
-        self.connection = MongoDBConnection(self.config)
+        self.connection: Optional[MongoDBConnection] = None
         self.handlers = {}
         self.initialized = False
+        self.use_msgpack = False
+        
+        # 同一轮事件循环内完成的响应合并为一次写入
+        self._output = bytearray()
+        self._flush_scheduled = False
         
         logger.info("MongoDB MCP服务器初始化中...")
-        logger.info(f"连接配置: {self.config.mongodb_host}:{self.config.mongodb_port}")
-        logger.info(f"目标数据库: {self.config.mongodb_database}")
-        logger.info(f"集群模式: {self.config.is_cluster_mode}")
+        logger.info("连接配置: %s:%s", self.config.mongodb_host, self.config.mongodb_port)
+        logger.info("目标数据库: %s", self.config.mongodb_database)
+        logger.info("集群模式: %s", self.config.is_cluster_mode)
     
     async def setup_handlers(self):
         """设置MongoDB处理器."""
+        # 处理器只在首次调用时构建，重复初始化请求直接复用
+        if self.handlers:
+            return True
+        
         try:
-            await self.connection.connect()
+            self.connection = await get_connection()
             logger.info("✅ MongoDB连接建立成功")
             
             self.handlers = {
                 'database': DatabaseHandler(self.connection.client),
                 'collection': CollectionHandler(self.connection.client),
-                'document': DocumentHandler(self.connection.client, self.config.mongodb_allow_dangerous),
+                'document': DocumentHandler(
+                    self.connection.client,
+                    self.config.mongodb_allow_dangerous,
+                    self.config.mongodb_max_field_bytes
+                ),
                 'aggregation': AggregationHandler(self.connection.client, self.config.mongodb_allow_dangerous)
             }
             
@@ -57,9 +164,38 @@ class MCPServer:
             return True
             
         except Exception as e:
-            logger.error(f"❌ 处理器初始化失败: {e}")
+            logger.error("❌ 处理器初始化失败: %s", e)
             return False
     
+    def _write_message(self, message: Dict[str, Any]):
+        """将JSON-RPC消息以UTF-8字节写入stdout."""
+        self._write_bytes(encode_result(message))
+    
+    def _write_bytes(self, payload: bytes):
+        """将已序列化的消息加入输出缓冲，并在本轮事件循环结束时统一写出."""
+        self._output += payload
+        self._output += b'\n'
+        
+        if self._flush_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush_output()
+            return
+        self._flush_scheduled = True
+        loop.call_soon(self._flush_output)
+    
+    def _flush_output(self):
+        """将缓冲的响应一次性写入stdout."""
+        self._flush_scheduled = False
+        if not self._output:
+            return
+        
+        data, self._output = self._output, bytearray()
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    
     def send_response(self, id: Optional[int], result: Any):
         """发送MCP响应到stdout."""
         response = {
@@ -67,25 +203,27 @@ class MCPServer:
             "id": id,
             "result": result
         }
-        json.dump(response, sys.stdout, ensure_ascii=False)
-        sys.stdout.write('\n')
-        sys.stdout.flush()
-        logger.debug(f"发送响应: {response}")
+        self._write_message(response)
+        logger.debug("发送响应: %s", response)
     
     def send_error(self, id: Optional[int], code: int, message: str):
         """发送错误响应到stdout."""
-        error_response = {
-            "jsonrpc": "2.0",
-            "id": id,
-            "error": {
-                "code": code,
-                "message": message
-            }
-        }
-        json.dump(error_response, sys.stdout, ensure_ascii=False)
-        sys.stdout.write('\n')
-        sys.stdout.flush()
-        logger.error(f"发送错误: {message}")
+        code_part = _ERROR_CODE_PARTS.get(code)
+        if code_part is None:
+            self._write_message({
+                "jsonrpc": "2.0",
+                "id": id,
+                "error": {
+                    "code": code,
+                    "message": message
+                }
+            })
+        else:
+            self._write_bytes(
+                _ERROR_PREFIX + orjson.dumps(id) + code_part
+                + orjson.dumps(message) + b'}}'
+            )
+        logger.error("发送错误: %s", message)
     
     async def handle_initialize(self, id: int, params: Dict[str, Any]) -> Dict[str, Any]:
         """处理MCP初始化请求."""
@@ -96,10 +234,14 @@ class MCPServer:
             if not success:
                 raise RuntimeError("服务器初始化失败")
         
+        experimental = (params.get('capabilities') or {}).get('experimental') or {}
+        self.use_msgpack = MSGPACK_CAPABILITY in experimental
+        
         return {
             "protocolVersion": "2024-11-05",
             "capabilities": {
-                "tools": {}
+                "tools": {},
+                "experimental": {MSGPACK_CAPABILITY: {}}
             },
             "serverInfo": {
                 "name": "mongodb-mcp",
@@ -112,185 +254,117 @@ class MCPServer:
         """处理工具列表请求."""
         logger.info("处理工具列表请求...")
         
-        tools = [
-            {
-                "name": "list_databases",
-                "description": "列出所有可用的MongoDB数据库",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            },
-            {
-                "name": "list_collections", 
-                "description": "列出数据库中的集合",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "database": {"type": "string", "description": "数据库名称"}
-                    },
-                    "required": ["database"]
-                }
-            },
-            {
-                "name": "find_documents",
-                "description": "查询匹配条件的文档", 
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "database": {"type": "string", "description": "数据库名称"},
-                        "collection": {"type": "string", "description": "集合名称"},
-                        "query": {"type": "object", "description": "查询条件"},
-                        "limit": {"type": "integer", "description": "限制结果数量", "default": 100}
-                    },
-                    "required": ["database", "collection"]
-                }
-            },
-            {
-                "name": "count_documents",
-                "description": "统计匹配条件的文档数量",
-                "inputSchema": {
-                    "type": "object", 
-                    "properties": {
-                        "database": {"type": "string", "description": "数据库名称"},
-                        "collection": {"type": "string", "description": "集合名称"},
-                        "query": {"type": "object", "description": "查询条件"}
-                    },
-                    "required": ["database", "collection"]
-                }
-            },
-            {
-                "name": "aggregate_pipeline",
-                "description": "执行MongoDB聚合管道",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "database": {"type": "string", "description": "数据库名称"},
-                        "collection": {"type": "string", "description": "集合名称"},
-                        "pipeline": {"type": "array", "description": "聚合管道阶段"},
-                        "limit": {"type": "integer", "description": "限制结果数量", "default": 100}
-                    },
-                    "required": ["database", "collection", "pipeline"]
-                }
-            }
-        ]
-        
-        return {"tools": tools}
+        return _TOOLS_LIST_RESULT
     
     async def handle_tool_call(self, id: int, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """处理工具调用请求."""
-        logger.info(f"调用工具: {name}")
+        logger.info("调用工具: %s", name)
         
         if not self.initialized:
             raise RuntimeError("服务器未初始化")
         
         try:
-            if name == "list_databases":
-                result = await self.handlers['database'].list_databases()
-                
-            elif name == "list_collections":
-                database = arguments.get('database')
-                result = await self.handlers['collection'].list_collections(database)
-                
-            elif name == "find_documents":
-                database = arguments.get('database')
-                collection = arguments.get('collection')
-                query = arguments.get('query', {})
-                limit = arguments.get('limit', 100)
-                
-                result = await self.handlers['document'].find_documents(
-                    database, collection, query, limit=limit
-                )
-                
-            elif name == "count_documents":
-                database = arguments.get('database')
-                collection = arguments.get('collection')
-                query = arguments.get('query', {})
+            call = _TOOL_CALLS.get(name)
+            if call is None:
+                raise ValueError(f"未知工具: {name}")
+            result = await call(self.handlers, arguments)
+            
+            logger.info("✅ 工具 %s 执行成功", name)
+            if self.use_msgpack:
+                return {"content": [{
+                    "type": "resource",
+                    "resource": {
+                        "uri": f"mongodb-mcp://tools/{name}/result",
+                        "mimeType": "application/msgpack",
+                        "blob": base64.b64encode(encode_msgpack(result)).decode()
+                    }
+                }]}
+            return {"content": [{"type": "text", "text": encode_result(result, indent=True).decode()}]}
+            
+        except Exception as e:
+            logger.error("❌ 工具 %s 执行失败: %s", name, e)
+            raise
+    
+    async def dispatch(self, request: Dict[str, Any]):
+        """处理单个请求并写回响应."""
+        req_id = None
+        try:
+            method = request.get('method')
+            params = request.get('params', {})
+            req_id = request.get('id')
+            
+            if method == 'initialize':
+                result = await self.handle_initialize(req_id, params)
+                self.send_response(req_id, result)
                 
-                result = await self.handlers['document'].count_documents(
-                    database, collection, query
+            elif method == 'tools/list':
+                # 直接拼接预序列化的工具列表，跳过重复编码
+                logger.info("处理工具列表请求...")
+                self._write_bytes(
+                    b'{"jsonrpc":"2.0","id":' + orjson.dumps(req_id)
+                    + b',"result":' + _TOOLS_LIST_BYTES + b'}'
                 )
                 
-            elif name == "aggregate_pipeline":
-                database = arguments.get('database')
-                collection = arguments.get('collection')
-                pipeline = arguments.get('pipeline', [])
-                limit = arguments.get('limit', 100)
-                
-                result = await self.handlers['aggregation'].aggregate_pipeline(
-                    database, collection, pipeline, limit
-                )
+            elif method == 'tools/call':
+                tool_name = params.get('name')
+                tool_args = params.get('arguments', {})
+                result = await self.handle_tool_call(req_id, tool_name, tool_args)
+                self.send_response(req_id, result)
                 
             else:
-                raise ValueError(f"未知工具: {name}")
-            
-            logger.info(f"✅ 工具 {name} 执行成功")
-            return {"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, indent=2)}]}
-            
+                self.send_error(req_id, -32601, f"未知方法: {method}")
+                
         except Exception as e:
-            logger.error(f"❌ 工具 {name} 执行失败: {e}")
-            raise
+            logger.error("请求处理错误: %s", e)
+            self.send_error(req_id, -32603, f"内部错误: {e}")
     
     async def run(self):
         """运行MCP服务器主循环."""
         logger.info("🚀 MongoDB MCP服务器启动")
         logger.info("📡 等待stdio输入...")
         
+        # 工具调用并发执行；每条响应在一次同步写入中完成，不会互相穿插
+        pending: Set[asyncio.Task] = set()
         try:
-            while True:
-                # 从stdin读取请求
-                line = sys.stdin.readline()
-                if not line:
-                    logger.info("📡 收到EOF，服务器关闭")
-                    break
-                
+            async for line in read_lines():
                 try:
-                    request = json.loads(line.strip())
-                    logger.debug(f"收到请求: {request}")
-                    
-                    method = request.get('method')
-                    params = request.get('params', {})
-                    req_id = request.get('id')
-                    
-                    if method == 'initialize':
-                        result = await self.handle_initialize(req_id, params)
-                        self.send_response(req_id, result)
-                        
-                    elif method == 'tools/list':
-                        result = await self.handle_tools_list(req_id)
-                        self.send_response(req_id, result)
-                        
-                    elif method == 'tools/call':
-                        tool_name = params.get('name')
-                        tool_args = params.get('arguments', {})
-                        result = await self.handle_tool_call(req_id, tool_name, tool_args)
-                        self.send_response(req_id, result)
-                        
-                    else:
-                        self.send_error(req_id, -32601, f"未知方法: {method}")
-                        
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON解析错误: {e}")
+                    request = orjson.loads(line)
+                    logger.debug("收到请求: %s", request)
+                except orjson.JSONDecodeError as e:
+                    logger.error("JSON解析错误: %s", e)
                     self.send_error(None, -32700, "JSON解析错误")
-                    
-                except Exception as e:
-                    logger.error(f"请求处理错误: {e}")
-                    self.send_error(req_id, -32603, f"内部错误: {e}")
+                    continue
+                
+                # 初始化必须在后续工具调用之前完成
+                if isinstance(request, dict) and request.get('method') == 'initialize':
+                    await self.dispatch(request)
+                    continue
+                
+                task = asyncio.create_task(self.dispatch(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            
+            logger.info("📡 收到EOF，服务器关闭")
+            if pending:
+                await asyncio.gather(*pending)
                     
         except KeyboardInterrupt:
             logger.info("🛑 收到中断信号，服务器关闭")
         finally:
+            self._flush_output()
             if self.connection:
-                await self.connection.disconnect()
+                await close_connection()
             logger.info("🔚 服务器已关闭")
 
 
 async def main():
     """主函数."""
+    # 配置日志输出到stderr，避免干扰stdio通信
+    configure_logging()
     server = MCPServer()
     await server.run()
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
\ No newline at end of file
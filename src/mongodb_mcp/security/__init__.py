@@ -2,9 +2,11 @@
 
 from .validator import QueryValidator, AggregationValidator
 from .sanitizer import InputSanitizer
+from .pipeline import SecurityPipeline
 
 __all__ = [
     "QueryValidator",
     "AggregationValidator", 
     "InputSanitizer",
+    "SecurityPipeline",
 ]
\ No newline at end of file
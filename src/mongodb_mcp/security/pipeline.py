@@ -0,0 +1,53 @@
+"""Single-pass security processing for MongoDB queries."""
+
+from functools import lru_cache
+from typing import Any, Dict
+
+import orjson
+
+from .sanitizer import InputSanitizer
+from .validator import QueryValidator
+
+# Larger queries are processed every time rather than pinned in the cache
+_MAX_CACHED_QUERY_BYTES = 4096
+
+
+class SecurityPipeline:
+    """Validates and sanitizes MongoDB inputs in one traversal."""
+    
+    @classmethod
+    def process_query(cls, query: Dict[str, Any], allow_dangerous: bool = False) -> Dict[str, Any]:
+        """Validate operators, check depth and sanitize a query in one walk.
+        
+        Equivalent to ``QueryValidator.validate_query`` followed by
+        ``InputSanitizer.sanitize_query``, raising the same errors.
+        Queries already seen to be valid and clean are returned as-is
+        without walking them again.
+        """
+        try:
+            key = orjson.dumps(query)
+        except TypeError:
+            # Non-JSON values (ObjectId, datetime, ...) are never cached
+            return cls._process(query, allow_dangerous)
+        
+        if len(key) <= _MAX_CACHED_QUERY_BYTES and _is_clean(key, allow_dangerous):
+            return query
+        return cls._process(query, allow_dangerous)
+    
+    @staticmethod
+    def _process(query: Dict[str, Any], allow_dangerous: bool) -> Dict[str, Any]:
+        """Run the combined validation and sanitization walk."""
+        def check_key(key: Any) -> None:
+            QueryValidator.check_operator(key, allow_dangerous)
+        
+        return InputSanitizer.sanitize_query(query, check_key)
+
+
+@lru_cache(maxsize=1024)
+def _is_clean(key: bytes, allow_dangerous: bool) -> bool:
+    """Whether the serialized query validates and needs no sanitizing.
+
+    Invalid queries raise and are therefore never cached.
+    """
+    query = orjson.loads(key)
+    return SecurityPipeline._process(query, allow_dangerous) is query
@@ -1,7 +1,16 @@
 """Input sanitization for MongoDB MCP."""
 
-from typing import Any, Dict, List, Union
-import re
+import json
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import orjson
+
+# Null bytes and control characters stripped from string inputs
+# (\x00-\x08, \x0B, \x0C, \x0E-\x1F, \x7F)
+_CONTROL_CHARS_TABLE = dict.fromkeys(
+    [*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F]
+)
 
 
 class InputSanitizer:
@@ -22,61 +31,120 @@ class InputSanitizer:
             raise ValueError(f"String exceeds maximum length {cls.MAX_STRING_LENGTH}")
         
         # Remove null bytes and control characters
-        sanitized = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', value)
+        sanitized = value.translate(_CONTROL_CHARS_TABLE)
         
         return sanitized.strip()
     
     @classmethod
-    def sanitize_query(cls, query: Dict[str, Any]) -> Dict[str, Any]:
-        """Sanitize MongoDB query structure."""
-        cls._check_depth(query, 0)
-        return cls._sanitize_dict(query)
+    def sanitize_query(
+        cls,
+        query: Dict[str, Any],
+        check_key: Optional[Callable[[Any], None]] = None
+    ) -> Dict[str, Any]:
+        """Sanitize MongoDB query structure.
+        
+        ``check_key`` is called with every sanitized dict key during the same
+        walk, letting callers validate operators without a second traversal.
+        Checking the key after stripping means ``" $where"`` is validated as
+        the ``"$where"`` it becomes.
+        """
+        return cls._sanitize_dict(query, 0, check_key)
     
     @classmethod
     def sanitize_document(cls, document: Dict[str, Any]) -> Dict[str, Any]:
         """Sanitize document for insertion/update."""
-        import json
-        doc_size = len(json.dumps(document, default=str))
+        # The walk enforces the depth limit before anything is serialized
+        sanitized = cls._sanitize_dict(document, 0)
+        
+        try:
+            encoded = orjson.dumps(sanitized, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # orjson rejects values such as integers beyond 64 bits
+            encoded = json.dumps(sanitized, default=str)
+        doc_size = len(encoded)
         if doc_size > cls.MAX_DOCUMENT_SIZE:
             raise ValueError(f"Document size {doc_size} exceeds limit {cls.MAX_DOCUMENT_SIZE}")
         
-        cls._check_depth(document, 0)
-        return cls._sanitize_dict(document)
+        return sanitized
     
     @classmethod
-    def _check_depth(cls, obj: Any, current_depth: int) -> None:
-        """Check nesting depth to prevent deep recursion."""
-        if current_depth > cls.MAX_QUERY_DEPTH:
+    def _check_depth(cls, depth: int) -> None:
+        """Reject values nested deeper than MAX_QUERY_DEPTH."""
+        if depth > cls.MAX_QUERY_DEPTH:
             raise ValueError(f"Structure exceeds maximum depth {cls.MAX_QUERY_DEPTH}")
-        
-        if isinstance(obj, dict):
-            for value in obj.values():
-                cls._check_depth(value, current_depth + 1)
-        elif isinstance(obj, list):
-            for item in obj:
-                cls._check_depth(item, current_depth + 1)
     
     @classmethod
-    def _sanitize_dict(cls, obj: Dict[str, Any]) -> Dict[str, Any]:
-        """Recursively sanitize dictionary."""
-        sanitized = {}
-        for key, value in obj.items():
-            # Sanitize keys
-            clean_key = cls.sanitize_string(key) if isinstance(key, str) else key
+    def _sanitize_dict(
+        cls,
+        obj: Dict[str, Any],
+        depth: int,
+        check_key: Optional[Callable[[Any], None]] = None
+    ) -> Dict[str, Any]:
+        """Recursively sanitize dictionary, enforcing the depth limit in the same walk.
+        
+        Returns ``obj`` itself when nothing needs rewriting; a copy is only
+        made once the first key or value actually changes. Recursion is
+        bounded by MAX_QUERY_DEPTH because depth is checked before descending.
+        """
+        child_depth = depth + 1
+        sanitized = None
+        for index, (key, value) in enumerate(obj.items()):
+            cls._check_depth(child_depth)
+            
+            # Sanitize keys, then validate the key that will actually be stored
+            clean_key = cls._sanitize_scalar(key)
+            if check_key is not None:
+                check_key(clean_key)
             
             # Sanitize values
-            if isinstance(value, str):
-                sanitized[clean_key] = cls.sanitize_string(value)
-            elif isinstance(value, dict):
-                sanitized[clean_key] = cls._sanitize_dict(value)
+            if isinstance(value, dict):
+                clean_value = cls._sanitize_dict(value, child_depth, check_key)
             elif isinstance(value, list):
-                sanitized[clean_key] = [
-                    cls._sanitize_dict(item) if isinstance(item, dict)
-                    else cls.sanitize_string(item) if isinstance(item, str)
-                    else item
-                    for item in value
-                ]
+                clean_value = cls._sanitize_list(value, child_depth, check_key)
+            else:
+                clean_value = cls._sanitize_scalar(value)
+            
+            if sanitized is None:
+                if clean_key is key and clean_value is value:
+                    continue
+                sanitized = dict(islice(obj.items(), index))
+            sanitized[clean_key] = clean_value
+        
+        return obj if sanitized is None else sanitized
+    
+    @classmethod
+    def _sanitize_list(
+        cls,
+        items: List[Any],
+        depth: int,
+        check_key: Optional[Callable[[Any], None]] = None
+    ) -> List[Any]:
+        """Sanitize list items, copying only when an item changes."""
+        child_depth = depth + 1
+        sanitized = None
+        for index, item in enumerate(items):
+            cls._check_depth(child_depth)
+            
+            if isinstance(item, dict):
+                clean_item = cls._sanitize_dict(item, child_depth, check_key)
+            elif isinstance(item, list):
+                clean_item = cls._sanitize_list(item, child_depth, check_key)
             else:
-                sanitized[clean_key] = value
+                clean_item = cls._sanitize_scalar(item)
+            
+            if sanitized is None:
+                if clean_item is item:
+                    continue
+                sanitized = items[:index]
+            sanitized.append(clean_item)
+        
+        return items if sanitized is None else sanitized
+    
+    @classmethod
+    def _sanitize_scalar(cls, value: Any) -> Any:
+        """Sanitize strings, returning the original object when unchanged."""
+        if not isinstance(value, str):
+            return value
         
-        return sanitized
\ No newline at end of file
+        sanitized = cls.sanitize_string(value)
+        return value if sanitized == value else sanitized
\ No newline at end of file
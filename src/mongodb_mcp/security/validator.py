@@ -1,6 +1,6 @@
 """Query and operation validation for MongoDB MCP."""
 
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, FrozenSet
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -8,16 +8,22 @@ class QueryValidator:
     """Validates MongoDB queries for security."""
     
     # Allowed query operators in safe mode
-    SAFE_QUERY_OPERATORS: Set[str] = {
+    SAFE_QUERY_OPERATORS: FrozenSet[str] = frozenset({
         "$eq", "$ne", "$gt", "$gte", "$lt", "$lte", 
         "$in", "$nin", "$exists", "$type", "$regex",
         "$and", "$or", "$not", "$nor", "$size",
         "$elemMatch", "$all"
-    }
+    })
     
     # Dangerous operators that require explicit permission
-    DANGEROUS_OPERATORS: Set[str] = {
+    DANGEROUS_OPERATORS: FrozenSet[str] = frozenset({
         "$where", "$expr", "$jsonSchema", "$text"
+    })
+    
+    # Operator -> requires dangerous mode; one probe classifies any operator
+    OPERATOR_DANGER: Dict[str, bool] = {
+        **dict.fromkeys(SAFE_QUERY_OPERATORS, False),
+        **dict.fromkeys(DANGEROUS_OPERATORS, True),
     }
     
     @classmethod
@@ -25,15 +31,21 @@ class QueryValidator:
         """Validate MongoDB query structure."""
         cls._validate_dict(query, allow_dangerous)
     
+    @classmethod
+    def check_operator(cls, key: str, allow_dangerous: bool = False) -> None:
+        """Validate a single query key."""
+        if key.startswith("$"):
+            dangerous = cls.OPERATOR_DANGER.get(key)
+            if dangerous is None:
+                raise ValueError(f"Unknown or forbidden operator: {key}")
+            elif dangerous and not allow_dangerous:
+                raise ValueError(f"Dangerous operator '{key}' not allowed in safe mode")
+    
     @classmethod
     def _validate_dict(cls, obj: Dict[str, Any], allow_dangerous: bool) -> None:
         """Recursively validate dictionary structure."""
         for key, value in obj.items():
-            if key.startswith("$"):
-                if key in cls.DANGEROUS_OPERATORS and not allow_dangerous:
-                    raise ValueError(f"Dangerous operator '{key}' not allowed in safe mode")
-                elif key not in cls.SAFE_QUERY_OPERATORS and key not in cls.DANGEROUS_OPERATORS:
-                    raise ValueError(f"Unknown or forbidden operator: {key}")
+            cls.check_operator(key, allow_dangerous)
             
             if isinstance(value, dict):
                 cls._validate_dict(value, allow_dangerous)
@@ -47,16 +59,22 @@ class AggregationValidator:
     """Validates MongoDB aggregation pipelines."""
     
     # Safe aggregation stages
-    SAFE_STAGES: Set[str] = {
+    SAFE_STAGES: FrozenSet[str] = frozenset({
         "$match", "$project", "$sort", "$limit", "$skip", 
         "$group", "$unwind", "$lookup", "$addFields",
         "$count", "$facet", "$bucket", "$sample"
-    }
+    })
     
     # Dangerous stages requiring special permission
-    DANGEROUS_STAGES: Set[str] = {
+    DANGEROUS_STAGES: FrozenSet[str] = frozenset({
         "$out", "$merge", "$geoNear", "$graphLookup", 
         "$function", "$accumulator", "$expr"
+    })
+    
+    # Stage -> requires dangerous mode
+    STAGE_DANGER: Dict[str, bool] = {
+        **dict.fromkeys(SAFE_STAGES, False),
+        **dict.fromkeys(DANGEROUS_STAGES, True),
     }
     
     @classmethod
@@ -79,10 +97,11 @@ class AggregationValidator:
             
             stage_name = next(iter(stage.keys()))
             
-            if stage_name in cls.DANGEROUS_STAGES and not allow_dangerous:
-                raise ValueError(f"Dangerous stage '{stage_name}' not allowed in safe mode")
-            elif stage_name not in cls.SAFE_STAGES and stage_name not in cls.DANGEROUS_STAGES:
+            dangerous = cls.STAGE_DANGER.get(stage_name)
+            if dangerous is None:
                 raise ValueError(f"Unknown or forbidden stage: {stage_name}")
+            elif dangerous and not allow_dangerous:
+                raise ValueError(f"Dangerous stage '{stage_name}' not allowed in safe mode")
 
 
 class DocumentValidator(BaseModel):
@@ -5,7 +5,8 @@ from typing import Dict, Any, List, Optional
 from fastmcp import FastMCP
 
 from .config import get_config, MongoDBConfig
-from .connection import MongoDBConnection
+from .connection import MongoDBConnection, close_connection, get_connection
+from .eventloop import install_uvloop
 from .handlers import DatabaseHandler, CollectionHandler, DocumentHandler, AggregationHandler
 
 
@@ -14,7 +15,7 @@ class MongoDBMCPServer:
     
     def __init__(self):
         self.config = get_config()
-        self.connection = MongoDBConnection(self.config)
+        self.connection: Optional[MongoDBConnection] = None
         
         # Initialize handlers
         self.db_handler: Optional[DatabaseHandler] = None
@@ -24,13 +25,17 @@ class MongoDBMCPServer:
     
     async def setup(self):
         """Initialize MongoDB connection and handlers."""
-        await self.connection.connect()
+        if self.db_handler is not None:
+            return
+        
+        self.connection = await get_connection()
         
         self.db_handler = DatabaseHandler(self.connection.client)
         self.collection_handler = CollectionHandler(self.connection.client)
         self.document_handler = DocumentHandler(
             self.connection.client, 
-            self.config.mongodb_allow_dangerous
+            self.config.mongodb_allow_dangerous,
+            self.config.mongodb_max_field_bytes
         )
         self.aggregation_handler = AggregationHandler(
             self.connection.client,
@@ -39,66 +44,71 @@ class MongoDBMCPServer:
     
     async def cleanup(self):
         """Cleanup connections."""
-        await self.connection.disconnect()
+        await close_connection()
 
 
 # Create FastMCP app
 mcp = FastMCP("MongoDB MCP Server")
 
 # Global server instance - will be initialized when first tool is called
-server_instance = None
+server_instance: Optional[MongoDBMCPServer] = None
+_server_lock = asyncio.Lock()
 
 
-async def ensure_server_initialized():
-    """确保服务器已初始化."""
+async def ensure_server_initialized() -> MongoDBMCPServer:
+    """确保服务器已初始化（仅首次调用时加锁构建）."""
     global server_instance
     if server_instance is None:
-        server_instance = MongoDBMCPServer()
-        await server_instance.setup()
+        async with _server_lock:
+            if server_instance is None:
+                server = MongoDBMCPServer()
+                await server.setup()
+                server_instance = server
+    return server_instance
 
 
 # Database Operations
 @mcp.tool
 async def list_databases() -> List[Dict[str, Any]]:
     """List all available MongoDB databases."""
-    await ensure_server_initialized()
-    return await server_instance.db_handler.list_databases()
+    server = server_instance or await ensure_server_initialized()
+    return await server.db_handler.list_databases()
 
 
 @mcp.tool
 async def get_database_stats(database: str) -> Dict[str, Any]:
     """Get comprehensive database statistics."""
-    await ensure_server_initialized()
-    return await server_instance.db_handler.get_database_stats(database)
+    server = server_instance or await ensure_server_initialized()
+    return await server.db_handler.get_database_stats(database)
 
 
 # Collection Operations  
 @mcp.tool
 async def list_collections(database: str) -> List[Dict[str, Any]]:
     """List collections in specified database."""
-    await ensure_server_initialized()
-    return await server_instance.collection_handler.list_collections(database)
+    server = server_instance or await ensure_server_initialized()
+    return await server.collection_handler.list_collections(database)
 
 
 @mcp.tool
 async def describe_collection(database: str, collection: str) -> Dict[str, Any]:
     """Get collection schema, indexes, and metadata."""
-    await ensure_server_initialized()
-    return await server_instance.collection_handler.describe_collection(database, collection)
+    server = server_instance or await ensure_server_initialized()
+    return await server.collection_handler.describe_collection(database, collection)
 
 
 @mcp.tool
 async def get_collection_stats(database: str, collection: str) -> Dict[str, Any]:
     """Get collection performance statistics."""
-    await ensure_server_initialized()
-    return await server_instance.collection_handler.get_collection_stats(database, collection)
+    server = server_instance or await ensure_server_initialized()
+    return await server.collection_handler.get_collection_stats(database, collection)
 
 
 @mcp.tool
 async def list_indexes(database: str, collection: str) -> List[Dict[str, Any]]:
     """List all indexes for a collection."""
-    await ensure_server_initialized()
-    return await server_instance.collection_handler.list_indexes(database, collection)
+    server = server_instance or await ensure_server_initialized()
+    return await server.collection_handler.list_indexes(database, collection)
 
 
 # Document Operations (Read)
@@ -113,8 +123,8 @@ async def find_documents(
     skip: int = 0
 ) -> Dict[str, Any]:
     """Find documents matching query criteria."""
-    await ensure_server_initialized()
-    return await server_instance.document_handler.find_documents(
+    server = server_instance or await ensure_server_initialized()
+    return await server.document_handler.find_documents(
         database, collection, query, projection, sort, limit, skip
     )
 
@@ -127,8 +137,8 @@ async def find_one_document(
     projection: Dict[str, Any] = None
 ) -> Optional[Dict[str, Any]]:
     """Find single document matching criteria."""
-    await ensure_server_initialized()
-    return await server_instance.document_handler.find_one_document(
+    server = server_instance or await ensure_server_initialized()
+    return await server.document_handler.find_one_document(
         database, collection, query, projection
     )
 
@@ -140,8 +150,8 @@ async def count_documents(
     query: Dict[str, Any] = None
 ) -> int:
     """Count documents matching query."""
-    await ensure_server_initialized()
-    return await server_instance.document_handler.count_documents(database, collection, query)
+    server = server_instance or await ensure_server_initialized()
+    return await server.document_handler.count_documents(database, collection, query)
 
 
 # Aggregation Operations
@@ -153,9 +163,9 @@ async def aggregate_pipeline(
     limit: int = 100
 ) -> Dict[str, Any]:
     """Execute MongoDB aggregation pipeline."""
-    await ensure_server_initialized()
-    return await server_instance.aggregation_handler.aggregate_pipeline(
-        database, collection, pipeline, limit, server_instance.config.mongodb_max_pipeline_stages
+    server = server_instance or await ensure_server_initialized()
+    return await server.aggregation_handler.aggregate_pipeline(
+        database, collection, pipeline, limit, server.config.mongodb_max_pipeline_stages
     )
 
 
@@ -167,8 +177,8 @@ async def insert_document(
     document: Dict[str, Any]
 ) -> Dict[str, Any]:
     """Insert single document (requires dangerous mode)."""
-    await ensure_server_initialized()
-    return await server_instance.document_handler.insert_document(database, collection, document)
+    server = server_instance or await ensure_server_initialized()
+    return await server.document_handler.insert_document(database, collection, document)
 
 
 @mcp.tool
@@ -180,8 +190,8 @@ async def update_document(
     upsert: bool = False
 ) -> Dict[str, Any]:
     """Update documents matching query (requires dangerous mode)."""
-    await ensure_server_initialized()
-    return await server_instance.document_handler.update_document(
+    server = server_instance or await ensure_server_initialized()
+    return await server.document_handler.update_document(
         database, collection, query, update, upsert
     )
 
@@ -193,8 +203,8 @@ async def delete_document(
     query: Dict[str, Any]
 ) -> Dict[str, Any]:
     """Delete documents matching query (requires dangerous mode)."""
-    await ensure_server_initialized()
-    return await server_instance.document_handler.delete_document(database, collection, query)
+    server = server_instance or await ensure_server_initialized()
+    return await server.document_handler.delete_document(database, collection, query)
 
 
 @mcp.tool
@@ -206,21 +216,26 @@ async def create_index(
     unique: bool = False,
     background: bool = True
 ) -> Dict[str, Any]:
-    """Create index on collection (requires dangerous mode)."""
-    await ensure_server_initialized()
-    kwargs = {'background': background}
+    """Create index on collection (requires dangerous mode).
+
+    ``background`` is accepted for compatibility but ignored: MongoDB 4.2+
+    builds all indexes with the same optimized process.
+    """
+    server = server_instance or await ensure_server_initialized()
+    kwargs = {}
     if name:
         kwargs['name'] = name
     if unique:
         kwargs['unique'] = unique
         
-    return await server_instance.aggregation_handler.create_index(
+    return await server.aggregation_handler.create_index(
         database, collection, keys, **kwargs
     )
 
 
 def main():
     """Main entry point for the MCP server."""
+    install_uvloop()
     mcp.run()
 
 
@@ -1,18 +1,115 @@
 #!/usr/bin/env python3
 """简化的MongoDB MCP服务器实现（不依赖FastMCP）."""
 
-import json
 import sys
 import asyncio
-from pathlib import Path
-from typing import Dict, Any, List, Optional
+import logging
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional, Set, Union
 
-# 添加父目录到路径以便导入
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import msgspec
+import orjson
 
+from mongodb_mcp.codecs import encode_result
 from mongodb_mcp.config import get_config
-from mongodb_mcp.connection import MongoDBConnection  
+from mongodb_mcp.connection import MongoDBConnection, close_connection, get_connection
+from mongodb_mcp.eventloop import install_uvloop
 from mongodb_mcp.handlers import DatabaseHandler, CollectionHandler, DocumentHandler, AggregationHandler
+from mongodb_mcp.stdio import configure_logging, read_lines, write_line
+
+logger = logging.getLogger(__name__)
+
+class McpRequest(msgspec.Struct):
+    """JSON-RPC请求."""
+    jsonrpc: str = "2.0"
+    # 缺少id的请求为通知，不返回响应
+    id: Union[int, str, None, msgspec.UnsetType] = msgspec.UNSET
+    method: str = ""
+    params: Dict[str, Any] = {}
+
+
+# stdin请求直接解码为McpRequest（批量请求为数组），不经过中间dict
+_REQUEST_DECODER = msgspec.json.Decoder(Union[McpRequest, List[McpRequest]])
+
+# JSON-RPC响应信封，只需填入序列化后的id和结果/错误信息
+_RESPONSE_TEMPLATE = b'{"jsonrpc":"2.0","id":%b,"result":%b}'
+_ERROR_TEMPLATE = b'{"jsonrpc":"2.0","id":%b,"error":{"code":-1,"message":%b}}'
+
+# 非空字符串参数（数据库名、集合名）
+_Name = Annotated[str, msgspec.Meta(min_length=1)]
+
+# 每批从服务器拉取的结果数；一次性读取时设为limit可避免getMore往返
+_BatchSize = Annotated[int, msgspec.Meta(gt=0)]
+
+
+class NoArgs(msgspec.Struct):
+    """无参数工具."""
+
+
+class DatabaseArgs(msgspec.Struct):
+    """数据库级工具参数."""
+    database: _Name
+
+
+class CountArgs(msgspec.Struct):
+    """count_documents工具参数."""
+    database: _Name
+    collection: _Name
+    query: Dict[str, Any] = {}
+
+
+class FindArgs(msgspec.Struct):
+    """find_documents工具参数."""
+    database: _Name
+    collection: _Name
+    query: Dict[str, Any] = {}
+    limit: int = 100
+    stream: bool = False
+    batch_size: Optional[_BatchSize] = None
+
+
+class AggregateArgs(msgspec.Struct):
+    """aggregate_pipeline工具参数."""
+    database: _Name
+    collection: _Name
+    pipeline: List[Dict[str, Any]] = []
+    limit: int = 100
+    stream: bool = False
+    batch_size: Optional[_BatchSize] = None
+
+
+def _batch_options(args: Union[FindArgs, AggregateArgs]) -> Dict[str, int]:
+    """未指定batch_size时沿用处理器默认值（普通查询1000，流式100）."""
+    return {} if args.batch_size is None else {'batch_size': args.batch_size}
+
+
+# 工具名 -> 参数类型，调用时由msgspec一次完成校验和转换
+_ARG_TYPES = {
+    'list_databases': NoArgs,
+    'list_collections': DatabaseArgs,
+    'find_documents': FindArgs,
+    'count_documents': CountArgs,
+    'aggregate_pipeline': AggregateArgs,
+}
+
+# initialize和tools/list的返回内容固定不变，导入时序列化一次
+_INITIALIZE_BYTES = orjson.dumps({
+    "protocolVersion": "2024-11-05",
+    "capabilities": {
+        "tools": {}
+    },
+    "serverInfo": {
+        "name": "mongodb-mcp",
+        "version": "0.1.0",
+        "description": "MongoDB模型上下文协议服务器"
+    }
+})
+_TOOLS_LIST_BYTES = orjson.dumps({"tools": [
+    {"name": "list_databases", "description": "列出所有可用的MongoDB数据库"},
+    {"name": "list_collections", "description": "列出数据库中的集合"},
+    {"name": "find_documents", "description": "查询匹配条件的文档"},
+    {"name": "count_documents", "description": "统计匹配条件的文档数量"},
+    {"name": "aggregate_pipeline", "description": "执行MongoDB聚合管道"}
+]})
 
 
 class SimpleMCPServer:
@@ -21,18 +118,39 @@ class SimpleMCPServer:
     def __init__(self):
         """初始化服务器."""
         self.config = get_config()
-        self.connection = MongoDBConnection(self.config)
+        self.connection: Optional[MongoDBConnection] = None
         self.handlers = {}
         
+        # 工具名 -> 绑定的处理方法，调用时一次字典查找完成分发
+        self._dispatch = {
+            'list_databases': self._do_list_databases,
+            'list_collections': self._do_list_collections,
+            'find_documents': self._do_find_documents,
+            'count_documents': self._do_count_documents,
+            'aggregate_pipeline': self._do_aggregate_pipeline,
+        }
+        # 支持stream参数的工具：客户端提供progressToken时结果分批以进度通知发送
+        self._streams = {
+            'find_documents': self._stream_find_documents,
+            'aggregate_pipeline': self._stream_aggregate_pipeline,
+        }
+        
     async def initialize(self):
         """初始化MongoDB连接和处理器."""
+        if self.handlers:
+            return True
+        
         try:
-            await self.connection.connect()
+            self.connection = await get_connection()
             
             self.handlers = {
                 'database': DatabaseHandler(self.connection.client),
                 'collection': CollectionHandler(self.connection.client),
-                'document': DocumentHandler(self.connection.client, self.config.mongodb_allow_dangerous),
+                'document': DocumentHandler(
+                    self.connection.client,
+                    self.config.mongodb_allow_dangerous,
+                    self.config.mongodb_max_field_bytes
+                ),
                 'aggregation': AggregationHandler(self.connection.client, self.config.mongodb_allow_dangerous)
             }
             
@@ -41,160 +159,247 @@ class SimpleMCPServer:
             self.send_error(f"初始化失败: {e}")
             return False
     
+    def _write_bytes(self, payload: bytes):
+        """将已序列化的消息一次性写入stdout."""
+        write_line(payload)
+    
+    def _write_message(self, message: Dict[str, Any]):
+        """将JSON-RPC消息以UTF-8字节一次性写入stdout."""
+        self._write_bytes(encode_result(message))
+    
+    @classmethod
+    def _build_response(cls, id: int, result: Any) -> bytes:
+        """序列化MCP响应，只编码结果本身，外层信封直接拼接."""
+        # count_documents等返回整数的工具直接格式化，不经过JSON编码器
+        if type(result) is int:
+            return cls._build_cached(id, b'%d' % result)
+        return cls._build_cached(id, encode_result(result))
+    
+    @staticmethod
+    def _build_cached(id: int, result_bytes: bytes) -> bytes:
+        """拼接预先序列化的响应结果，只序列化请求id."""
+        return _RESPONSE_TEMPLATE % (orjson.dumps(id), result_bytes)
+    
+    @staticmethod
+    def _build_error(message: str, id: int = None) -> bytes:
+        """序列化错误响应."""
+        return _ERROR_TEMPLATE % (orjson.dumps(id), orjson.dumps(message))
+    
     def send_response(self, id: int, result: Any):
         """发送MCP响应."""
-        response = {
+        self._write_bytes(self._build_response(id, result))
+    
+    def send_cached(self, id: int, result_bytes: bytes):
+        """发送预先序列化的响应结果，只拼接请求id."""
+        self._write_bytes(self._build_cached(id, result_bytes))
+    
+    def send_notification(self, method: str, params: Dict[str, Any]):
+        """发送JSON-RPC通知（无id，不需要响应）."""
+        self._write_message({
             "jsonrpc": "2.0",
-            "id": id,
-            "result": result
-        }
-        json.dump(response, sys.stdout, ensure_ascii=False)
-        sys.stdout.write('\n')
-        sys.stdout.flush()
+            "method": method,
+            "params": params
+        })
     
     def send_error(self, message: str, id: int = None):
         """发送错误响应."""
-        error_response = {
-            "jsonrpc": "2.0", 
-            "id": id,
-            "error": {
-                "code": -1,
-                "message": message
-            }
-        }
-        json.dump(error_response, sys.stdout, ensure_ascii=False)
-        sys.stdout.write('\n')
-        sys.stdout.flush()
+        self._write_bytes(self._build_error(message, id))
     
-    async def handle_request(self, request: Dict[str, Any]):
+    async def handle_request(self, request: McpRequest):
         """处理MCP请求."""
-        method = request.get('method')
-        params = request.get('params', {})
-        req_id = request.get('id', 1)
+        response = await self._respond(request)
+        if response is not None:
+            self._write_bytes(response)
+    
+    async def handle_batch(self, requests: List[McpRequest]):
+        """并发处理JSON-RPC批量请求，以一个数组返回全部响应."""
+        if not requests:
+            self.send_error("批量请求不能为空")
+            return
         
-        try:
-            if method == 'initialize':
-                # MCP初始化
-                result = {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {
-                        "tools": {}
-                    },
-                    "serverInfo": {
-                        "name": "mongodb-mcp",
-                        "version": "0.1.0",
-                        "description": "MongoDB模型上下文协议服务器"
-                    }
-                }
-                self.send_response(req_id, result)
-                
-            elif method == 'tools/list':
-                # 列出所有工具
-                tools = [
-                    {"name": "list_databases", "description": "列出所有可用的MongoDB数据库"},
-                    {"name": "list_collections", "description": "列出数据库中的集合"},
-                    {"name": "find_documents", "description": "查询匹配条件的文档"},
-                    {"name": "count_documents", "description": "统计匹配条件的文档数量"},
-                    {"name": "aggregate_pipeline", "description": "执行MongoDB聚合管道"}
-                ]
-                self.send_response(req_id, {"tools": tools})
-                
-            elif method == 'tools/call':
-                # 调用工具
-                tool_name = params.get('name')
-                tool_params = params.get('arguments', {})
-                
-                result = await self.call_tool(tool_name, tool_params)
-                self.send_response(req_id, result)
-                
-            else:
-                self.send_error(f"未知方法: {method}", req_id)
-                
-        except Exception as e:
-            self.send_error(f"请求处理失败: {e}", req_id)
+        responses = await asyncio.gather(*(self._respond(request) for request in requests))
+        responses = [response for response in responses if response is not None]
+        if responses:
+            self._write_bytes(b'[' + b','.join(responses) + b']')
     
-    async def call_tool(self, tool_name: str, params: Dict[str, Any]) -> Any:
-        """调用指定的工具."""
-        if tool_name == 'list_databases':
-            return await self.handlers['database'].list_databases()
-            
-        elif tool_name == 'list_collections':
-            database = params.get('database')
-            if not database:
-                raise ValueError("缺少必需参数: database")
-            return await self.handlers['collection'].list_collections(database)
-            
-        elif tool_name == 'find_documents':
-            database = params.get('database')
-            collection = params.get('collection')
-            if not database or not collection:
-                raise ValueError("缺少必需参数: database, collection")
-            
-            query = params.get('query', {})
-            limit = params.get('limit', 100)
-            
-            return await self.handlers['document'].find_documents(
-                database, collection, query, limit=limit
-            )
-            
-        elif tool_name == 'count_documents':
-            database = params.get('database')
-            collection = params.get('collection')
-            if not database or not collection:
-                raise ValueError("缺少必需参数: database, collection")
-            
-            query = params.get('query', {})
-            return await self.handlers['document'].count_documents(database, collection, query)
+    async def _respond(self, request: McpRequest) -> Optional[bytes]:
+        """处理单个请求，返回序列化后的响应；通知不需要响应，返回None."""
+        if request.id is msgspec.UNSET:
+            return None
+        
+        method = request.method
+        params = request.params
+        req_id = request.id
+        
+        if method == 'initialize':
+            # MCP初始化
+            return self._build_cached(req_id, _INITIALIZE_BYTES)
             
-        elif tool_name == 'aggregate_pipeline':
-            database = params.get('database')
-            collection = params.get('collection') 
-            pipeline = params.get('pipeline', [])
+        elif method == 'tools/list':
+            # 列出所有工具
+            return self._build_cached(req_id, _TOOLS_LIST_BYTES)
             
-            if not database or not collection:
-                raise ValueError("缺少必需参数: database, collection")
+        elif method == 'tools/call':
+            # 调用工具
+            tool_name = params.get('name')
+            tool_params = params.get('arguments', {})
             
-            limit = params.get('limit', 100)
-            return await self.handlers['aggregation'].aggregate_pipeline(
-                database, collection, pipeline, limit
-            )
+            try:
+                # 只有客户端提供了progressToken才能向其发送进度通知
+                meta = params.get('_meta') or {}
+                result = await self.call_tool(
+                    tool_name, tool_params, meta.get('progressToken')
+                )
+            except (ValueError, PermissionError, RuntimeError) as e:
+                # 参数校验与处理器抛出的预期错误
+                return self._build_error(f"请求处理失败: {e}", req_id)
+            except Exception as e:
+                logger.exception("工具调用异常: %s", tool_name)
+                return self._build_error(f"请求处理失败: {e}", req_id)
+            return self._build_response(req_id, result)
             
         else:
+            return self._build_error(f"未知方法: {method}", req_id)
+    
+    async def serve_stdio(self):
+        """从stdin读取JSON-RPC请求并并发处理，直到EOF."""
+        if not await self.initialize():
+            return
+        
+        pending: Set[asyncio.Task] = set()
+        try:
+            async for line in read_lines():
+                try:
+                    request = _REQUEST_DECODER.decode(line)
+                except msgspec.DecodeError:
+                    self.send_error("JSON解析错误")
+                    continue
+                
+                if isinstance(request, list):
+                    task = asyncio.create_task(self.handle_batch(request))
+                else:
+                    task = asyncio.create_task(self.handle_request(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            await close_connection()
+    
+    async def call_tool(
+        self,
+        tool_name: str,
+        params: Dict[str, Any],
+        progress_token: Any = None
+    ) -> Any:
+        """调用指定的工具."""
+        handler = self._dispatch.get(tool_name)
+        if handler is None:
             raise ValueError(f"未知工具: {tool_name}")
+        
+        # 一次完成参数的类型校验和解码，缺少必需参数时抛出ValueError
+        args = msgspec.convert(params, _ARG_TYPES[tool_name])
+        # 没有progressToken时无法发送进度通知，退回普通的一次性结果
+        if progress_token is not None and getattr(args, 'stream', False):
+            return await self._streams[tool_name](args, progress_token)
+        return await handler(args)
+    
+    async def _do_list_databases(self, args: NoArgs) -> Any:
+        """执行list_databases工具."""
+        return await self.handlers['database'].list_databases()
+    
+    async def _do_list_collections(self, args: DatabaseArgs) -> Any:
+        """执行list_collections工具."""
+        return await self.handlers['collection'].list_collections(args.database)
+    
+    async def _do_find_documents(self, args: FindArgs) -> Any:
+        """执行find_documents工具."""
+        return await self.handlers['document'].find_documents(
+            args.database, args.collection, args.query, limit=args.limit,
+            **_batch_options(args)
+        )
+    
+    async def _do_count_documents(self, args: CountArgs) -> Any:
+        """执行count_documents工具."""
+        return await self.handlers['document'].count_documents(
+            args.database, args.collection, args.query
+        )
+    
+    async def _do_aggregate_pipeline(self, args: AggregateArgs) -> Any:
+        """执行aggregate_pipeline工具."""
+        return await self.handlers['aggregation'].aggregate_pipeline(
+            args.database, args.collection, args.pipeline, args.limit,
+            **_batch_options(args)
+        )
+    
+    async def _stream_find_documents(self, args: FindArgs, progress_token: Any) -> Any:
+        """以分批进度通知执行find_documents工具."""
+        batches = self.handlers['document'].stream_documents(
+            args.database, args.collection, args.query, limit=args.limit,
+            **_batch_options(args)
+        )
+        return await self._send_batches(progress_token, batches, 'documents', args.limit)
+    
+    async def _stream_aggregate_pipeline(self, args: AggregateArgs, progress_token: Any) -> Any:
+        """以分批进度通知执行aggregate_pipeline工具."""
+        batches = self.handlers['aggregation'].stream_pipeline(
+            args.database, args.collection, args.pipeline, args.limit,
+            **_batch_options(args)
+        )
+        return await self._send_batches(progress_token, batches, 'results', args.limit)
+    
+    async def _send_batches(
+        self,
+        progress_token: Any,
+        batches: AsyncIterator[List[Dict[str, Any]]],
+        field: str,
+        limit: int
+    ) -> Dict[str, Any]:
+        """将每批结果作为notifications/progress发送，最终响应只包含汇总信息."""
+        count = 0
+        async for batch in batches:
+            count += len(batch)
+            self.send_notification("notifications/progress", {
+                "progressToken": progress_token,
+                "progress": count,
+                field: batch
+            })
+        return {'count': count, 'hasMore': count == limit, 'streamed': True}
 
 
 async def test_mcp_server():
     """测试MCP服务器完整功能."""
-    print("🧪 测试完整MCP服务器功能...", file=sys.stderr)
+    logger.info("🧪 测试完整MCP服务器功能...")
     
     server = SimpleMCPServer()
     
     if not await server.initialize():
-        print("❌ 服务器初始化失败", file=sys.stderr)
+        logger.error("❌ 服务器初始化失败")
         return False
     
-    print("✅ MCP服务器初始化成功", file=sys.stderr)
+    logger.info("✅ MCP服务器初始化成功")
     
     # 测试工具调用
     try:
         # 测试数据库列表
         databases = await server.call_tool('list_databases', {})
-        print(f"✅ list_databases: 发现 {len(databases)} 个数据库", file=sys.stderr)
+        logger.info("✅ list_databases: 发现 %s 个数据库", len(databases))
         
         # 测试集合列表
         collections = await server.call_tool('list_collections', {'database': 'medical_ai'})
-        print(f"✅ list_collections: medical_ai有 {len(collections)} 个集合", file=sys.stderr)
+        logger.info("✅ list_collections: medical_ai有 %s 个集合", len(collections))
         
         if collections:
             first_collection = collections[0]['name']
-            print(f"  第一个集合: {first_collection}", file=sys.stderr)
+            logger.info("  第一个集合: %s", first_collection)
             
             # 测试文档计数
             count = await server.call_tool('count_documents', {
                 'database': 'medical_ai',
                 'collection': first_collection
             })
-            print(f"✅ count_documents: {first_collection} 有 {count} 个文档", file=sys.stderr)
+            logger.info("✅ count_documents: %s 有 %s 个文档", first_collection, count)
             
             # 测试聚合管道
             agg_result = await server.call_tool('aggregate_pipeline', {
@@ -203,24 +408,33 @@ async def test_mcp_server():
                 'pipeline': [{'$limit': 1}],
                 'limit': 1
             })
-            print(f"✅ aggregate_pipeline: 返回 {len(agg_result['results'])} 个结果", file=sys.stderr)
+            logger.info("✅ aggregate_pipeline: 返回 %s 个结果", len(agg_result['results']))
         
-        print("🎉 所有MCP工具测试通过!", file=sys.stderr)
+        logger.info("🎉 所有MCP工具测试通过!")
         return True
         
     except Exception as e:
-        print(f"❌ MCP工具测试失败: {e}", file=sys.stderr)
+        logger.error("❌ MCP工具测试失败: %s", e)
         return False
     finally:
-        await server.connection.disconnect()
+        await close_connection()
+
+
+async def main():
+    """以stdio模式运行简化服务器（python -m mongodb_mcp --simple）."""
+    configure_logging()
+    server = SimpleMCPServer()
+    await server.serve_stdio()
 
 
 if __name__ == "__main__":
     # 测试MCP服务器
+    configure_logging(fmt='%(message)s')
+    install_uvloop()
     success = asyncio.run(test_mcp_server())
     
     if success:
-        print("🎯 MongoDB MCP服务器完全验证通过!", file=sys.stderr)
+        logger.info("🎯 MongoDB MCP服务器完全验证通过!")
         
         # 输出最终验证报告到stdout
         verification_report = {
@@ -240,8 +454,6 @@ if __name__ == "__main__":
             }
         }
         
-        json.dump(verification_report, sys.stdout, ensure_ascii=False, indent=2)
-        sys.stdout.write('\n')
-        sys.stdout.flush()
+        write_line(encode_result(verification_report, indent=True))
     
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""stdio传输的读取、写出与日志配置."""
+
+import asyncio
+import atexit
+import io
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# 单条stdin请求的最大长度，需容纳16MB文档及其JSON开销
+STDIN_LINE_LIMIT = 64 * 1024 * 1024
+
+
+async def _skip_line(reader: asyncio.StreamReader) -> None:
+    """丢弃超长行的剩余部分，直到换行符或EOF."""
+    while True:
+        try:
+            await reader.readuntil(b'\n')
+            return
+        except asyncio.LimitOverrunError as e:
+            await reader.read(e.consumed)
+        except asyncio.IncompleteReadError:
+            return
+
+
+async def read_lines() -> AsyncIterator[bytes]:
+    """异步逐行读取stdin，不阻塞事件循环.
+    
+    StreamReader在等待换行符时只扫描新到达的数据，
+    大请求不会被重复扫描；单行长度受STDIN_LINE_LIMIT限制。
+    超长的行被整行丢弃并以空行代替，由调用方按JSON解析错误回复后继续读取。
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT)
+    try:
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+    except (ValueError, OSError):
+        # stdin为普通文件等不支持管道传输时，退回到线程中读取
+        while True:
+            line = await loop.run_in_executor(
+                None, sys.stdin.buffer.readline, STDIN_LINE_LIMIT + 1
+            )
+            if not line:
+                return
+            if len(line) > STDIN_LINE_LIMIT and not line.endswith(b'\n'):
+                logger.warning("请求超过%d字节，已丢弃", STDIN_LINE_LIMIT)
+                while not line.endswith(b'\n'):
+                    line = await loop.run_in_executor(
+                        None, sys.stdin.buffer.readline, STDIN_LINE_LIMIT + 1
+                    )
+                    if not line:
+                        break
+                line = b''
+            yield line
+    
+    # readline在超长时抛出ValueError且可能残留半行，改用readuntil整行丢弃
+    while True:
+        try:
+            line = await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as e:
+            # EOF前最后一行可能没有换行符
+            if e.partial:
+                yield e.partial
+            return
+        except asyncio.LimitOverrunError:
+            logger.warning("请求超过%d字节，已丢弃", STDIN_LINE_LIMIT)
+            await _skip_line(reader)
+            line = b''
+        yield line
+
+
+def write_line(payload: bytes) -> None:
+    """将一条消息及其换行符写入stdout.
+    
+    通过os.writev一次系统调用提交，不为追加换行符复制整个payload；
+    stdout没有文件描述符时退回到缓冲写入。
+    """
+    stdout = sys.stdout.buffer
+    try:
+        fd = stdout.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        stdout.write(payload)
+        stdout.write(b'\n')
+        stdout.flush()
+        return
+    
+    stdout.flush()
+    try:
+        written = os.writev(fd, (payload, b'\n'))
+    except BlockingIOError:
+        written = 0
+    
+    # 部分写入时由缓冲写入补齐剩余部分
+    if written <= len(payload):
+        if written < len(payload):
+            stdout.write(memoryview(payload)[written:])
+        stdout.write(b'\n')
+        stdout.flush()
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    fmt: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+) -> None:
+    """将日志输出到stderr，避免干扰stdio通信.
+    
+    日志记录经队列交给后台线程写出，事件循环线程不会阻塞在stderr上。
+    与 ``logging.basicConfig`` 一致，根日志器已有处理器时不做任何修改。
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    
+    root.setLevel(level)
+    
+    stderr_handler = logging.StreamHandler(sys.stderr)
+    stderr_handler.setFormatter(logging.Formatter(fmt))
+    
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(records, stderr_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    root.addHandler(QueueHandler(records))
@@ -0,0 +1,93 @@
+import pytest
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.closed = False
+
+    def limit(self, limit):
+        self.docs = self.docs[:limit]
+        return self
+
+    def batch_size(self, size):
+        self.fetch_size = size
+        return self
+
+    async def to_list(self, length=None):
+        batch, self.docs = self.docs[:length], self.docs[length:]
+        return batch
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.queries = []
+        self.calls = []
+        self.codec_options = None
+        self.cursor = None
+
+    def with_options(self, codec_options):
+        self.codec_options = codec_options
+        return self
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        docs = self.docs
+        if isinstance(query.get("_id"), dict) and "$in" in query["_id"]:
+            # MongoDB treats true and 1 as distinct _id values
+            wanted = {(type(value), value) for value in query["_id"]["$in"]}
+            docs = [doc for doc in docs if (type(doc["_id"]), doc["_id"]) in wanted]
+        self.cursor = FakeCursor(docs)
+        return self.cursor
+
+    async def count_documents(self, query):
+        return len(self.docs)
+
+    async def aggregate(self, pipeline, **kwargs):
+        self.calls.append((pipeline, kwargs))
+        return FakeCursor(self.docs)
+
+    async def create_index(self, keys, **kwargs):
+        self.calls.append((keys, kwargs))
+        return "idx"
+
+
+class FakeClient:
+    def __init__(self, docs=()):
+        self.collection = FakeCollection(docs)
+
+    def __getitem__(self, name):
+        return {"users": self.collection}
+
+
+class FakeDocumentHandler:
+    async def find_documents(self, database, collection, query, projection=None, limit=100, **kwargs):
+        return {"documents": [{"n": 1}], "count": 1, "hasMore": False, "projection": projection}
+
+    async def count_documents(self, database, collection, query):
+        if "boom" in query:
+            raise KeyError("boom")
+        return 42
+
+    async def stream_documents(self, database, collection, query, limit=100, **kwargs):
+        yield [{"n": 1}, {"n": 2}]
+        yield [{"n": 3}]
+
+
+@pytest.fixture
+def fake_collection():
+    return FakeCollection
+
+
+@pytest.fixture
+def fake_client():
+    return FakeClient
+
+
+@pytest.fixture
+def fake_document_handler():
+    return FakeDocumentHandler()
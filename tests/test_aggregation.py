@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from mongodb_mcp.cache import _MISSING, metadata_cache
+from mongodb_mcp.handlers.aggregation import AggregationHandler
+
+
+def test_create_index_normalizes_compound_keys(fake_client) -> None:
+    client = fake_client()
+    handler = AggregationHandler(client, allow_dangerous=True)
+
+    asyncio.run(
+        handler.create_index("app", "users", {"age": 1.0, "bio": "text"}, unique=True)
+    )
+
+    assert client.collection.calls == [([("age", 1), ("bio", "text")], {"unique": True})]
+
+
+@pytest.mark.parametrize(
+    "keys, options",
+    [
+        ({"age": 2}, {}),
+        ({"age": True}, {}),
+        ({"age": False}, {}),
+        ({}, {}),
+        ({"age": 1}, {"background": True}),
+    ],
+)
+def test_create_index_rejects_invalid_specs(keys, options, fake_client) -> None:
+    handler = AggregationHandler(fake_client(), allow_dangerous=True)
+
+    with pytest.raises(ValueError):
+        asyncio.run(handler.create_index("app", "users", keys, **options))
+
+
+def test_aggregation_batch_size_is_passed_to_cursor(fake_client) -> None:
+    client = fake_client([{"n": 1}])
+    handler = AggregationHandler(client)
+
+    asyncio.run(
+        handler.aggregate_pipeline("app", "users", [{"$match": {}}], limit=10, batch_size=4)
+    )
+    asyncio.run(handler.aggregate_pipeline("app", "users", [{"$match": {}}], limit=10))
+
+    assert [kwargs for _, kwargs in client.collection.calls] == [
+        {"batchSize": 4},
+        {"batchSize": 10},
+    ]
+
+
+@pytest.mark.parametrize(
+    "stage, target",
+    [
+        ({"$out": "archive"}, ("app", "archive")),
+        ({"$out": {"db": "reports", "coll": "archive"}}, ("reports", "archive")),
+        ({"$merge": "archive"}, ("app", "archive")),
+        ({"$merge": {"into": {"db": "reports", "coll": "archive"}}}, ("reports", "archive")),
+    ],
+)
+def test_write_stages_invalidate_target_metadata(stage, target, fake_client) -> None:
+    metadata_cache.set(("count", 0, *target), 1, 60)
+    metadata_cache.set(("count", 0, "app", "users"), 2, 60)
+    handler = AggregationHandler(fake_client(), allow_dangerous=True)
+
+    asyncio.run(handler.aggregate_pipeline("app", "users", [{"$match": {}}, stage]))
+
+    assert metadata_cache.get(("count", 0, *target)) is _MISSING
+    assert metadata_cache.get(("count", 0, "app", "users")) == 2
+    metadata_cache.invalidate()
@@ -0,0 +1,67 @@
+import asyncio
+
+from bson import ObjectId
+
+from mongodb_mcp.handlers.batching import BatchedReader
+
+
+def test_concurrent_lookups_share_one_query(fake_collection) -> None:
+    oid = ObjectId()
+    collection = fake_collection([{"_id": "a", "n": 1}, {"_id": oid, "n": 2}])
+    reader = BatchedReader(collection)
+
+    async def run():
+        return await asyncio.gather(
+            reader.find_one("a"), reader.find_one("b"), reader.find_one("a")
+        )
+
+    assert asyncio.run(run()) == [{"_id": "a", "n": 1}, None, {"_id": "a", "n": 1}]
+    assert collection.queries == [{"_id": {"$in": ["a", "b"]}}]
+
+
+def test_ids_equal_in_python_are_not_conflated(fake_collection) -> None:
+    collection = fake_collection([{"_id": 1, "n": "int"}, {"_id": True, "n": "bool"}])
+    reader = BatchedReader(collection)
+
+    async def run():
+        return await asyncio.gather(reader.find_one(1), reader.find_one(True))
+
+    assert [doc["n"] for doc in asyncio.run(run())] == ["int", "bool"]
+    assert sorted(map(str, collection.queries)) == [
+        "{'_id': {'$in': [1]}}",
+        "{'_id': {'$in': [True]}}",
+    ]
+
+
+def test_can_batch_requires_plain_id_equality() -> None:
+    assert BatchedReader.can_batch({"_id": "a"}, None)
+    assert BatchedReader.can_batch({"_id": "a"}, {"name": 1})
+    assert not BatchedReader.can_batch({"_id": "a"}, {"_id": 0})
+    assert not BatchedReader.can_batch({"_id": {"$gt": "a"}}, None)
+    assert not BatchedReader.can_batch({"_id": "a", "x": 1}, None)
+
+
+def test_cancelled_fetch_cancels_waiting_lookups() -> None:
+    started = []
+
+    class BlockingCursor:
+        async def to_list(self, length=None):
+            started.append(True)
+            await asyncio.Event().wait()
+
+    class BlockingCollection:
+        def find(self, query, projection=None):
+            return BlockingCursor()
+
+    reader = BatchedReader(BlockingCollection())
+
+    async def run():
+        lookup = asyncio.ensure_future(reader.find_one("a"))
+        while not started:
+            await asyncio.sleep(0)
+        for task in list(reader._tasks):
+            task.cancel()
+        done, _ = await asyncio.wait([lookup], timeout=1)
+        return lookup in done and lookup.cancelled()
+
+    assert asyncio.run(run())
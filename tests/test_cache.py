@@ -0,0 +1,110 @@
+import asyncio
+
+from mongodb_mcp.cache import _MISSING, TTLCache, async_ttl_cache, metadata_cache
+
+
+def test_ttl_cache_expires_entries() -> None:
+    cache = TTLCache()
+    key = ("list_collections", 1, "app", None)
+
+    cache.set(key, ["users"], ttl_seconds=60)
+    assert cache.get(key) == ["users"]
+
+    cache.set(key, ["users"], ttl_seconds=0)
+    assert cache.get(key) is _MISSING
+    assert key not in cache._entries
+
+
+def test_ttl_cache_invalidates_by_scope() -> None:
+    cache = TTLCache()
+    cache.set(("list_databases", 1, None, None), [], 60)
+    cache.set(("list_collections", 1, "app", None), [], 60)
+    cache.set(("list_indexes", 1, "app", "users"), [], 60)
+    cache.set(("list_indexes", 1, "app", "orders"), [], 60)
+    cache.set(("list_collections", 1, "other", None), [], 60)
+
+    cache.invalidate("app", "users")
+
+    assert set(cache._entries) == {
+        ("list_indexes", 1, "app", "orders"),
+        ("list_collections", 1, "other", None),
+    }
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache = TTLCache(maxsize=2)
+    cache.set(("a", 1, None, None), 1, 60)
+    cache.set(("b", 1, None, None), 2, 60)
+    cache.get(("a", 1, None, None))
+    cache.set(("c", 1, None, None), 3, 60)
+
+    assert set(cache._entries) == {("a", 1, None, None), ("c", 1, None, None)}
+
+
+def test_async_ttl_cache_reuses_result() -> None:
+    class Handler:
+        client = object()
+        calls = 0
+
+        @async_ttl_cache(ttl_seconds=60)
+        async def list_collections(self, database_name):
+            self.calls += 1
+            return [database_name]
+
+    handler = Handler()
+    metadata_cache.invalidate()
+    try:
+        assert asyncio.run(handler.list_collections("app")) == ["app"]
+        assert asyncio.run(handler.list_collections("app")) == ["app"]
+        assert handler.calls == 1
+    finally:
+        metadata_cache.invalidate()
+
+
+def test_async_ttl_cache_keys_on_query_contents() -> None:
+    class Handler:
+        client = object()
+        calls = 0
+
+        @async_ttl_cache(ttl_seconds=60)
+        async def count_documents(self, database_name, collection_name, query):
+            self.calls += 1
+            return len(query)
+
+    handler = Handler()
+    metadata_cache.invalidate()
+    try:
+        assert asyncio.run(handler.count_documents("app", "users", {"a": [1]})) == 1
+        assert asyncio.run(handler.count_documents("app", "users", {"a": [1]})) == 1
+        assert asyncio.run(handler.count_documents("app", "users", {"a": 1, "b": 2})) == 2
+        assert handler.calls == 2
+
+        asyncio.run(handler.count_documents("app", "users", {"a": [True]}))
+        assert handler.calls == 3
+
+        metadata_cache.invalidate("app", "users")
+        asyncio.run(handler.count_documents("app", "users", {"a": [1]}))
+        assert handler.calls == 4
+    finally:
+        metadata_cache.invalidate()
+
+
+def test_async_ttl_cache_results_are_not_shared() -> None:
+    class Handler:
+        client = object()
+
+        @async_ttl_cache(ttl_seconds=60)
+        async def list_collections(self, database_name):
+            return [{"name": "users"}]
+
+    handler = Handler()
+    metadata_cache.invalidate()
+    try:
+        first = asyncio.run(handler.list_collections("app"))
+        first[0]["name"] = "changed"
+        second = asyncio.run(handler.list_collections("app"))
+        second.append({"name": "extra"})
+
+        assert asyncio.run(handler.list_collections("app")) == [{"name": "users"}]
+    finally:
+        metadata_cache.invalidate()
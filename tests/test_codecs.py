@@ -0,0 +1,35 @@
+import msgspec
+import orjson
+from bson import ObjectId, decode, encode
+from bson.decimal128 import Decimal128
+
+from mongodb_mcp.codecs import JSON_CODEC_OPTIONS, encode_msgpack, encode_result
+
+
+def test_object_ids_decode_to_strings() -> None:
+    oid = ObjectId()
+    nested = ObjectId()
+
+    doc = decode(encode({"_id": oid, "ref": {"id": nested}}), JSON_CODEC_OPTIONS)
+
+    assert doc == {"_id": str(oid), "ref": {"id": str(nested)}}
+
+
+def test_encode_result_handles_bson_types() -> None:
+    oid = ObjectId()
+    payload = {"_id": oid, "price": Decimal128("1.50"), "name": "茶"}
+
+    assert orjson.loads(encode_result(payload)) == {
+        "_id": str(oid),
+        "price": "1.50",
+        "name": "茶",
+    }
+
+
+def test_encode_msgpack_handles_bson_types() -> None:
+    oid = ObjectId()
+    payload = {"_id": oid, "price": Decimal128("1.50"), "tags": ["a", "b"]}
+
+    decoded = msgspec.msgpack.decode(encode_msgpack(payload))
+
+    assert decoded == {"_id": str(oid), "price": "1.50", "tags": ["a", "b"]}
@@ -47,3 +47,13 @@ def test_config_builds_uri_from_fields(tmp_path: Path) -> None:
         "?authSource=ai_nexus_us&replicaSet=rs0&readPreference=secondaryPreferred"
         "&retryWrites=true"
     )
+
+
+def test_get_config_is_cached() -> None:
+    from mongodb_mcp.config import get_config
+
+    get_config.cache_clear()
+    try:
+        assert get_config() is get_config()
+    finally:
+        get_config.cache_clear()
@@ -0,0 +1,37 @@
+import asyncio
+
+from mongodb_mcp import connection as connection_module
+from mongodb_mcp.connection import MongoClientPool
+
+
+def test_pool_shares_one_connection_per_loop(monkeypatch) -> None:
+    connects = []
+
+    async def fake_connect(self):
+        connects.append(self)
+        await asyncio.sleep(0)
+
+    async def fake_disconnect(self):
+        pass
+
+    monkeypatch.setattr(connection_module.MongoDBConnection, "connect", fake_connect)
+    monkeypatch.setattr(connection_module.MongoDBConnection, "disconnect", fake_disconnect)
+    pool = MongoClientPool()
+
+    async def run():
+        return await asyncio.gather(pool.get(), pool.get(), pool.get())
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+
+    assert first[0] is first[1] is first[2]
+    assert second[0] is second[1] is second[2]
+    assert first[0] is not second[0]
+    assert len(connects) == 2
+
+    async def reopen():
+        await pool.close()
+        return await pool.get()
+
+    assert asyncio.run(reopen()) is not second[0]
+    assert len(pool._connections) == 1
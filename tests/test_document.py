@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from mongodb_mcp.cache import metadata_cache
+from mongodb_mcp.handlers import document as document_module
+from mongodb_mcp.handlers.document import DocumentHandler, _truncate_strings
+
+
+def test_truncate_strings_caps_utf8_bytes() -> None:
+    docs = [{"name": "茶" * 10, "tags": ["short", "x" * 20], "n": 1}]
+
+    result = _truncate_strings(docs, 8)
+
+    assert result is docs
+    assert docs == [{"name": "茶茶", "tags": ["short", "x" * 8], "n": 1}]
+
+
+def test_stream_documents_yields_bounded_batches(fake_client) -> None:
+    client = fake_client([{"n": n} for n in range(7)])
+    handler = DocumentHandler(client)
+
+    async def collect():
+        return [
+            batch
+            async for batch in handler.stream_documents("app", "users", limit=5, batch_size=2)
+        ]
+
+    assert asyncio.run(collect()) == [[{"n": 0}, {"n": 1}], [{"n": 2}, {"n": 3}], [{"n": 4}]]
+    assert client.collection.cursor.closed
+
+
+def test_find_documents_batch_size_is_capped_at_limit(fake_client) -> None:
+    client = fake_client([{"n": n} for n in range(7)])
+    handler = DocumentHandler(client)
+
+    result = asyncio.run(handler.find_documents("app", "users", limit=5, batch_size=50))
+
+    assert result["count"] == 5
+    assert client.collection.cursor.fetch_size == 5
+
+
+def test_cached_count_still_validates_dangerous_queries(fake_client) -> None:
+    client = fake_client([{"n": 1}])
+    query = {"$where": "this.n > 0"}
+    metadata_cache.invalidate()
+    try:
+        assert asyncio.run(
+            DocumentHandler(client, allow_dangerous=True).count_documents("app", "users", query)
+        ) == 1
+
+        with pytest.raises(ValueError):
+            asyncio.run(DocumentHandler(client).count_documents("app", "users", query))
+    finally:
+        metadata_cache.invalidate()
+
+
+def test_batched_readers_are_bounded(monkeypatch, fake_client, fake_collection) -> None:
+    monkeypatch.setattr(document_module, "_MAX_READERS", 2)
+    handler = DocumentHandler(fake_client([]))
+    collection = fake_collection([])
+
+    first = handler._reader("app", "a", collection)
+    handler._reader("app", "b", collection)
+    assert handler._reader("app", "a", collection) is first
+    handler._reader("app", "c", collection)
+
+    assert list(handler._readers) == [("app", "a"), ("app", "c")]
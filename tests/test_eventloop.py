@@ -0,0 +1,34 @@
+import asyncio
+import sys
+import types
+import warnings
+
+from mongodb_mcp.eventloop import install_uvloop
+
+
+class FakePolicy(asyncio.DefaultEventLoopPolicy):
+    pass
+
+
+def test_install_uvloop_sets_policy_without_deprecated_install(monkeypatch) -> None:
+    def install():
+        warnings.warn("uvloop.install() is deprecated", DeprecationWarning)
+
+    uvloop = types.SimpleNamespace(EventLoopPolicy=FakePolicy, install=install)
+    monkeypatch.setitem(sys.modules, "uvloop", uvloop)
+    monkeypatch.setattr(sys, "platform", "linux")
+    original = asyncio.get_event_loop_policy()
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            assert install_uvloop() is True
+        assert isinstance(asyncio.get_event_loop_policy(), FakePolicy)
+    finally:
+        asyncio.set_event_loop_policy(original)
+
+
+def test_install_uvloop_skips_missing_module(monkeypatch) -> None:
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+
+    assert install_uvloop() is False
@@ -0,0 +1,121 @@
+import asyncio
+import base64
+
+import msgspec
+import orjson
+import pytest
+
+from mongodb_mcp import mcp_server
+from mongodb_mcp.mcp_server import MCPServer, MSGPACK_CAPABILITY
+
+
+@pytest.fixture
+def server(fake_document_handler):
+    server = MCPServer()
+    server.handlers = {"document": fake_document_handler}
+    server.initialized = True
+    return server
+
+
+@pytest.fixture
+def stdout(capsysbinary):
+    return lambda: [orjson.loads(line) for line in capsysbinary.readouterr().out.splitlines()]
+
+
+def run(server, *requests):
+    async def dispatch_all():
+        await asyncio.gather(*(server.dispatch(request) for request in requests))
+        await asyncio.sleep(0)
+
+    asyncio.run(dispatch_all())
+
+
+def test_tools_list_splices_cached_bytes(server, stdout) -> None:
+    run(server, {"jsonrpc": "2.0", "id": "x", "method": "tools/list"})
+
+    assert stdout() == [
+        {"jsonrpc": "2.0", "id": "x", "result": mcp_server._TOOLS_LIST_RESULT}
+    ]
+
+
+@pytest.mark.parametrize(
+    "request_, code",
+    [
+        ({"id": 3, "method": "nope"}, -32601),
+        ({"id": 3, "method": "tools/call", "params": {"name": "nope"}}, -32603),
+    ],
+)
+def test_errors_use_cached_code_parts(server, stdout, request_, code) -> None:
+    run(server, request_)
+
+    [response] = stdout()
+    assert response["id"] == 3
+    assert response["error"]["code"] == code
+    assert "nope" in response["error"]["message"]
+
+
+def test_uncached_error_codes_fall_back_to_encoder(server, stdout) -> None:
+    server.send_error(None, -32000, "other")
+
+    assert stdout() == [
+        {"jsonrpc": "2.0", "id": None, "error": {"code": -32000, "message": "other"}}
+    ]
+
+
+def test_responses_in_one_loop_turn_are_written_together(server, stdout) -> None:
+    flushed = []
+    flush = server._flush_output
+
+    def counting_flush():
+        if server._output:
+            flushed.append(bytes(server._output))
+        flush()
+
+    server._flush_output = counting_flush
+    run(
+        server,
+        *(
+            {"id": n, "method": "tools/call",
+             "params": {"name": "count_documents", "arguments": {"database": "app"}}}
+            for n in range(3)
+        ),
+    )
+
+    responses = stdout()
+    assert sorted(response["id"] for response in responses) == [0, 1, 2]
+    assert all(orjson.loads(r["result"]["content"][0]["text"]) == 42 for r in responses)
+    assert len(flushed) == 1
+
+
+def test_msgpack_results_after_negotiation(server, stdout) -> None:
+    run(
+        server,
+        {"id": 1, "method": "initialize",
+         "params": {"capabilities": {"experimental": {MSGPACK_CAPABILITY: {}}}}},
+    )
+    run(
+        server,
+        {"id": 2, "method": "tools/call",
+         "params": {"name": "count_documents", "arguments": {"database": "app"}}},
+    )
+
+    init, call = stdout()
+    assert MSGPACK_CAPABILITY in init["result"]["capabilities"]["experimental"]
+    resource = call["result"]["content"][0]["resource"]
+    assert resource["mimeType"] == "application/msgpack"
+    assert msgspec.msgpack.decode(base64.b64decode(resource["blob"])) == 42
+
+
+@pytest.mark.parametrize(
+    "arguments, projection",
+    [({}, {"_id": 0}), ({"projection": {}}, {}), ({"projection": {"a": 1}}, {"a": 1})],
+)
+def test_find_documents_keeps_explicit_projection(server, stdout, arguments, projection) -> None:
+    run(
+        server,
+        {"id": 1, "method": "tools/call",
+         "params": {"name": "find_documents", "arguments": {"database": "app", **arguments}}},
+    )
+
+    [response] = stdout()
+    assert orjson.loads(response["result"]["content"][0]["text"])["projection"] == projection
@@ -0,0 +1,64 @@
+import pytest
+
+from mongodb_mcp.security.sanitizer import InputSanitizer
+
+
+def test_sanitize_query_returns_clean_query_unchanged() -> None:
+    query = {"status": "active", "tags": {"$in": ["a", "b"]}, "age": {"$gt": 3}}
+
+    assert InputSanitizer.sanitize_query(query) is query
+
+
+def test_sanitize_query_copies_only_dirty_branches() -> None:
+    clean = {"$gt": 3}
+    query = {"age": clean, "name": " bob\x00 ", "tags": ["a", "b\x07"]}
+
+    sanitized = InputSanitizer.sanitize_query(query)
+
+    assert sanitized == {"age": {"$gt": 3}, "name": "bob", "tags": ["a", "b"]}
+    assert sanitized["age"] is clean
+    assert query["name"] == " bob\x00 "
+    assert query["tags"] == ["a", "b\x07"]
+
+
+def test_sanitize_query_preserves_key_order() -> None:
+    query = {"a": 1, " b": 2, "c": 3}
+
+    assert list(InputSanitizer.sanitize_query(query)) == ["a", "b", "c"]
+
+
+def test_sanitize_query_enforces_depth_limit() -> None:
+    nested = {"a": 1}
+    for _ in range(InputSanitizer.MAX_QUERY_DEPTH - 1):
+        nested = {"a": nested}
+    assert InputSanitizer.sanitize_query(nested) is nested
+
+    with pytest.raises(ValueError):
+        InputSanitizer.sanitize_query({"a": nested})
+    with pytest.raises(ValueError):
+        InputSanitizer.sanitize_query({"a": [[[[[[[[[[["x"]]]]]]]]]]]})
+
+
+def test_sanitize_query_cleans_nested_lists() -> None:
+    assert InputSanitizer.sanitize_query({"a": [[" x "]]}) == {"a": [["x"]]}
+
+
+def test_sanitize_document_rejects_oversized_documents(monkeypatch) -> None:
+    monkeypatch.setattr(InputSanitizer, "MAX_DOCUMENT_SIZE", 32)
+
+    assert InputSanitizer.sanitize_document({"a": "b"}) == {"a": "b"}
+    with pytest.raises(ValueError):
+        InputSanitizer.sanitize_document({"a": "b" * 40})
+
+
+def test_sanitize_document_rejects_deep_nesting_with_value_error() -> None:
+    document = {}
+    for _ in range(300):
+        document = {"a": document}
+
+    with pytest.raises(ValueError, match="maximum depth"):
+        InputSanitizer.sanitize_document(document)
+
+
+def test_sanitize_document_accepts_integers_beyond_64_bits() -> None:
+    assert InputSanitizer.sanitize_document({"x": 2**70}) == {"x": 2**70}
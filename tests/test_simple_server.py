@@ -0,0 +1,148 @@
+import asyncio
+import logging
+
+import orjson
+import pytest
+
+from mongodb_mcp import simple_server
+from mongodb_mcp.simple_server import SimpleMCPServer, _REQUEST_DECODER
+
+
+@pytest.fixture
+def server(monkeypatch, fake_document_handler):
+    written = []
+    monkeypatch.setattr(simple_server, "write_line", written.append)
+    server = SimpleMCPServer()
+    server.handlers = {"document": fake_document_handler}
+    server.written = written
+    return server
+
+
+def respond(server, line):
+    response = asyncio.run(server._respond(_REQUEST_DECODER.decode(line)))
+    return None if response is None else orjson.loads(response)
+
+
+def test_stream_without_progress_token_returns_full_result(server) -> None:
+    response = respond(
+        server,
+        b'{"jsonrpc":"2.0","id":1,"method":"tools/call","params":{"name":"find_documents",'
+        b'"arguments":{"database":"app","collection":"users","stream":true}}}',
+    )
+
+    assert response["result"]["documents"] == [{"n": 1}]
+    assert server.written == []
+
+
+def test_stream_with_progress_token_sends_notifications(server) -> None:
+    response = respond(
+        server,
+        b'{"jsonrpc":"2.0","id":1,"method":"tools/call","params":{"name":"find_documents",'
+        b'"arguments":{"database":"app","collection":"users","stream":true},'
+        b'"_meta":{"progressToken":"t"}}}',
+    )
+
+    notifications = [orjson.loads(line) for line in server.written]
+    assert [n["params"]["progressToken"] for n in notifications] == ["t", "t"]
+    assert [n["params"]["progress"] for n in notifications] == [2, 3]
+    assert response["result"] == {"count": 3, "hasMore": False, "streamed": True}
+
+
+def call(name, arguments, id=1):
+    return orjson.dumps({
+        "jsonrpc": "2.0", "id": id, "method": "tools/call",
+        "params": {"name": name, "arguments": arguments},
+    })
+
+
+def test_integer_result_uses_response_template(server) -> None:
+    response = respond(server, call("count_documents", {"database": "app", "collection": "users"}))
+
+    assert response == {"jsonrpc": "2.0", "id": 1, "result": 42}
+
+
+def test_string_ids_round_trip(server) -> None:
+    response = respond(server, b'{"jsonrpc":"2.0","id":"a\\"b","method":"tools/list"}')
+
+    assert response["id"] == 'a"b'
+    assert [tool["name"] for tool in response["result"]["tools"]][:2] == [
+        "list_databases",
+        "list_collections",
+    ]
+
+
+def test_notifications_get_no_response(server) -> None:
+    assert respond(server, b'{"jsonrpc":"2.0","method":"notifications/initialized"}') is None
+
+
+def test_invalid_arguments_return_error_envelope(server, caplog) -> None:
+    with caplog.at_level(logging.ERROR, logger=simple_server.__name__):
+        response = respond(server, call("count_documents", {"database": "", "collection": "users"}))
+
+    assert not caplog.records
+    assert response["id"] == 1
+    assert response["error"]["code"] == -1
+    assert "database" in response["error"]["message"]
+
+
+def test_unknown_method_and_tool_return_errors(server) -> None:
+    assert "未知方法" in respond(server, b'{"id":1,"method":"nope"}')["error"]["message"]
+    assert "未知工具" in respond(server, call("nope", {}))["error"]["message"]
+
+
+def test_unexpected_tool_errors_are_logged(server, caplog) -> None:
+    with caplog.at_level(logging.ERROR, logger=simple_server.__name__):
+        response = respond(
+            server, call("count_documents", {"database": "app", "collection": "u", "query": {"boom": 1}})
+        )
+
+    assert "boom" in response["error"]["message"]
+    assert caplog.records[0].exc_info is not None
+
+
+def test_batch_returns_one_array_without_notification_replies(server) -> None:
+    line = b"[" + b",".join([
+        call("count_documents", {"database": "app", "collection": "users"}, id=1),
+        b'{"jsonrpc":"2.0","method":"notifications/initialized"}',
+        b'{"jsonrpc":"2.0","id":2,"method":"initialize"}',
+    ]) + b"]"
+
+    asyncio.run(server.handle_batch(_REQUEST_DECODER.decode(line)))
+
+    assert len(server.written) == 1
+    responses = orjson.loads(server.written[0])
+    assert [response["id"] for response in responses] == [1, 2]
+    assert responses[0]["result"] == 42
+    assert responses[1]["result"]["serverInfo"]["name"] == "mongodb-mcp"
+
+
+def test_empty_batch_is_an_error(server) -> None:
+    asyncio.run(server.handle_batch([]))
+
+    assert orjson.loads(server.written[0])["error"]["message"] == "批量请求不能为空"
+
+
+def test_serve_stdio_answers_each_line(server, monkeypatch) -> None:
+    async def lines():
+        yield b'{"jsonrpc":"2.0","id":1,"method":"tools/list"}'
+        yield b"not json"
+        yield b'[{"jsonrpc":"2.0","id":2,"method":"initialize"}]'
+
+    async def close_connection():
+        pass
+
+    async def initialize():
+        return True
+
+    monkeypatch.setattr(simple_server, "read_lines", lines)
+    monkeypatch.setattr(simple_server, "close_connection", close_connection)
+    monkeypatch.setattr(server, "initialize", initialize)
+
+    asyncio.run(server.serve_stdio())
+
+    responses = [orjson.loads(line) for line in server.written]
+    assert responses[0]["error"]["message"] == "JSON解析错误"
+    single = next(response for response in responses[1:] if isinstance(response, dict))
+    batch = next(response for response in responses[1:] if isinstance(response, list))
+    assert single["id"] == 1
+    assert [response["id"] for response in batch] == [2]
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import os
+import sys
+
+import pytest
+
+from mongodb_mcp import stdio
+from mongodb_mcp.stdio import configure_logging, read_lines, write_line
+
+
+def test_write_line_appends_newline(capfd) -> None:
+    write_line(b'{"id":1}')
+    write_line(b"x" * 100000)
+
+    out = capfd.readouterr().out
+    assert out == '{"id":1}\n' + "x" * 100000 + "\n"
+
+
+def test_configure_logging_keeps_existing_handlers(monkeypatch) -> None:
+    root = logging.getLogger()
+    handler = logging.NullHandler()
+    monkeypatch.setattr(root, "handlers", [handler])
+    monkeypatch.setattr(root, "level", logging.WARNING)
+
+    configure_logging()
+
+    assert root.handlers == [handler]
+    assert root.level == logging.WARNING
+
+
+@pytest.mark.parametrize("use_pipe", [True, False])
+def test_read_lines_replaces_oversized_lines(monkeypatch, tmp_path, use_pipe) -> None:
+    data = b"ok\n" + b"x" * 40 + b"\n" + b"y" * 16 + b"\nlast"
+    if use_pipe:
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, data)
+        os.close(write_fd)
+        stdin = os.fdopen(read_fd, "r")
+    else:
+        path = tmp_path / "stdin"
+        path.write_bytes(data)
+        stdin = open(path, "r")
+    monkeypatch.setattr(stdio, "STDIN_LINE_LIMIT", 16)
+    monkeypatch.setattr(sys, "stdin", stdin)
+
+    async def collect():
+        return [line async for line in read_lines()]
+
+    try:
+        lines = asyncio.run(collect())
+    finally:
+        stdin.close()
+
+    assert lines == [b"ok\n", b"", b"y" * 16 + b"\n", b"last"]
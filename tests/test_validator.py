@@ -0,0 +1,73 @@
+import pytest
+from pydantic import ValidationError
+
+from mongodb_mcp.security import SecurityPipeline
+from mongodb_mcp.security.pipeline import _is_clean
+from mongodb_mcp.security.validator import (
+    AggregationValidator,
+    DocumentValidator,
+    QueryValidator,
+)
+
+
+def test_validate_query_classifies_operators() -> None:
+    QueryValidator.validate_query({"age": {"$gt": 3}, "$or": [{"a": 1}]})
+    QueryValidator.validate_query({"$where": "true"}, allow_dangerous=True)
+
+    with pytest.raises(ValueError, match="Dangerous operator"):
+        QueryValidator.validate_query({"$where": "true"})
+    with pytest.raises(ValueError, match="Unknown or forbidden operator"):
+        QueryValidator.validate_query({"a": {"$bogus": 1}}, allow_dangerous=True)
+
+
+def test_validate_pipeline_classifies_stages() -> None:
+    AggregationValidator.validate_pipeline([{"$match": {}}, {"$limit": 5}])
+    AggregationValidator.validate_pipeline([{"$out": "x"}], allow_dangerous=True)
+
+    with pytest.raises(ValueError, match="Dangerous stage"):
+        AggregationValidator.validate_pipeline([{"$out": "x"}])
+    with pytest.raises(ValueError, match="Unknown or forbidden stage"):
+        AggregationValidator.validate_pipeline([{"$bogus": {}}], allow_dangerous=True)
+
+
+def test_security_pipeline_validates_and_sanitizes() -> None:
+    query = {"name": " bob ", "age": {"$gt": 3}}
+
+    assert SecurityPipeline.process_query(query) == {"name": "bob", "age": {"$gt": 3}}
+    with pytest.raises(ValueError, match="Dangerous operator"):
+        SecurityPipeline.process_query({"$or": [{"$where": "true"}]})
+
+
+def test_security_pipeline_reuses_clean_verdicts() -> None:
+    query = {"status": "active", "age": {"$gte": 18}}
+    _is_clean.cache_clear()
+
+    first = SecurityPipeline.process_query(query)
+    hits = _is_clean.cache_info().hits
+    again = SecurityPipeline.process_query({"status": "active", "age": {"$gte": 18}})
+
+    assert first is query
+    assert again == query
+    assert _is_clean.cache_info().hits == hits + 1
+    with pytest.raises(ValueError, match="Dangerous operator"):
+        SecurityPipeline.process_query({"$where": "true"})
+    assert SecurityPipeline.process_query({"$where": "true"}, allow_dangerous=True)
+
+
+@pytest.mark.parametrize("name", ["users", "ai_nexus-us", "用户", "A1"])
+def test_document_validator_accepts_names(name) -> None:
+    DocumentValidator(database=name, collection=name)
+
+
+@pytest.mark.parametrize(
+    "name", ["", "a.b", "a b", "$x", "a" * 65, "-", "___", "_-_", "a\u203fb", "e\u0301"]
+)
+def test_document_validator_rejects_names(name) -> None:
+    with pytest.raises(ValidationError):
+        DocumentValidator(database="app", collection=name)
+
+
+@pytest.mark.parametrize("key", [" $where", "$where\x00", "\t$where "])
+def test_security_pipeline_validates_stripped_keys(key) -> None:
+    with pytest.raises(ValueError, match="Dangerous operator"):
+        SecurityPipeline.process_query({key: "1"})